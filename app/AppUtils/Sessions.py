@@ -1,72 +1,189 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import pickle
-from .Utils import get_pred, show_pred, pred_session_buttoms_choice
+from .Utils import show_pred, pred_session_buttoms_choice, load_figure, lazy_expander, sweep_block, explain_block
+
+# pandas и Scoring (а с ним scikit-learn) импортируются внутри функций: при старте приложения
+# они не нужны, только при первом прогнозе
+
+MODEL_KEYS = {'model_1': 'model1', 'model_2': 'model2'}
+
+def _forget_csv_job():
+    st.session_state.pop('csv_job', None)
+    st.session_state.pop('csv_upload', None)
+    st.query_params.pop('job', None)
+
+def restore_csv_job():
+    # После обновления страницы сессия пустая: задача находится по ?job=<id> в адресе
+    job_id = st.query_params.get('job')
+    if not job_id or st.session_state.get('csv_job') == job_id:
+        return
+    from Scoring import JOBS
+
+    status = JOBS.get(job_id)
+    if status is None:
+        st.query_params.pop('job', None)
+        return
+    st.session_state['csv_job'] = job_id
+    st.session_state['model'] = {v: k for k, v in MODEL_KEYS.items()}[status['model']]
+    st.session_state['csv_mode'] = True
+
+@st.fragment(run_every=1.0)
+def _csv_job_progress(job_id):
+    # Перерисовывается только этот фрагмент; по завершении задачи - перезапуск всего скрипта
+    from Scoring import JOBS, ACTIVE_STATUSES
+
+    status = JOBS.get(job_id)
+    if status is None or status['status'] not in ACTIVE_STATUSES:
+        st.rerun()
+
+    total, done = status['rows_total'], status['rows_done']
+    if status['status'] == 'queued':
+        st.progress(0.0, text="Задача в очереди...")
+    else:
+        speed = done / status['elapsed'] if status['elapsed'] else 0
+        memory = status.get('memory') or {}
+        peak = f" · пик памяти {memory['peak_mb']:.0f} МБ" if memory.get('peak_mb') is not None else ""
+        st.progress(min(done / total, 1.0) if total else 0.0,
+                    text=f"Обработано {done} из {total} записей · {speed:,.0f} строк/с{peak}")
+    if st.button("⏹ Отменить", key="cancel_csv_job"):
+        JOBS.cancel(job_id)
+
+def session_csv_job(job_id):
+    import pandas as pd
+    from Scoring import JOBS, ACTIVE_STATUSES, FORMATS, output_name, read_head
+
+    status = JOBS.get(job_id)
+    if status is None:
+        st.warning("Задача не найдена: загрузите файл повторно")
+        _forget_csv_job()
+        return
+
+    st.divider()
+    st.subheader("Обработка прогнозов")
+    st.caption(f"Файл **{status['name']}** · задача `{job_id}`")
+
+    if status['status'] in ACTIVE_STATUSES:
+        _csv_job_progress(job_id)
+        return
+
+    if status['status'] == 'done':
+        fmt = status.get('format', 'csv')
+        st.success(f"✅ Прогнозы готовы для {status['rows_done']} записей за {status['elapsed']:.1f} с")
+        dedup = status.get('dedup')
+        if dedup and dedup['unique_rows'] < dedup['rows']:
+            st.caption(f"Повторяющиеся строки: {dedup['rows'] - dedup['unique_rows']} "
+                       f"({dedup['duplicate_share']:.1%}) посчитаны один раз, сэкономлено ~{max(dedup['saved_s'], 0):.1f} с")
+        memory = status.get('memory')
+        if memory and memory.get('budget_mb'):
+            # Размер части подобран по замеру памяти на первых строках файла
+            st.caption(f"Память: части по {memory['chunk_size']} строк (~{memory['row_bytes']} байт на строку "
+                       f"при бюджете {memory['budget_mb']} МБ)"
+                       + (f", пик процесса {memory['peak_mb']:.0f} МБ (+{memory['job_peak_mb']:.0f} МБ за задачу)"
+                          if memory.get('peak_mb') is not None else ""))
+        st.dataframe(read_head(status['output'], fmt, 1000, columns=['name', 'predicted_price']),
+                     use_container_width=True)
+        with open(status['output'], 'rb') as f:
+            st.download_button(
+                label=f"📥 Скачать результаты в {FORMATS[fmt]['label']}",
+                data=f,
+                file_name=output_name(fmt),
+                mime=FORMATS[fmt]['mime']
+            )
+        if status.get('explain_output'):
+            with open(status['explain_output'], 'rb') as f:
+                st.download_button(
+                    label="📥 Скачать объяснения прогнозов",
+                    data=f,
+                    file_name='explanations.csv',
+                    mime='text/csv',
+                    key='download_explanations'
+                )
+            st.caption("В каждой строке base плюс вклады полей равны predicted_price")
+        if status.get('errors'):
+            # Ошибочные строки не прерывают обработку файла: у них пустой прогноз и запись в отчете
+            st.warning(f"⚠️ {status['errors']} записей не удалось обработать, прогноз для них не рассчитан")
+            with st.expander("📋 Отчет об ошибках"):
+                st.dataframe(pd.read_csv(status['errors_output'], nrows=1000), use_container_width=True)
+            with open(status['errors_output'], 'rb') as f:
+                st.download_button(
+                    label="📥 Скачать отчет об ошибках",
+                    data=f,
+                    file_name='errors.csv',
+                    mime='text/csv',
+                    key='download_errors'
+                )
+    elif status['status'] == 'cancelled':
+        st.info(f"Задача отменена после {status['rows_done']} из {status['rows_total']} записей")
+    else:
+        st.error(f"Ошибка при обработке данных: {status['error']}")
+        st.info("Проверьте формат данных в CSV файле")
+
+    if st.button("Загрузить другой файл", key="new_csv_job"):
+        _forget_csv_job()
+        st.rerun()
 
 # На написании красивой загрузки CSV я сдался, session_pred_csv в большей степени писал DeepSeek
 def session_pred_csv(model_type):
+    from Scoring import JOBS, MODEL_INPUT_COLUMNS, UPLOAD_TYPES, UPLOADS, read_head
+
+    job_id = st.session_state.get('csv_job')
+    if job_id is not None:
+        status = JOBS.get(job_id)
+        if status is not None and status['model'] == model_type:
+            session_csv_job(job_id)
+            return
+
+    required_cols = MODEL_INPUT_COLUMNS[model_type]
+
     st.divider()
-    st.subheader("Загрузка CSV файла")
-    
-    uploaded_file = st.file_uploader(
-        "Загрузите CSV файл с данными об автомобилях", 
-        type=['csv'],
-        help="Файл должен содержать колонки: name, fuel, transmission, owner, seats",
-        key="csv_uploader"
-    )
-    
-    if uploaded_file is not None:
+    st.subheader("Загрузка файла")
+
+    # В сессии хранится только ключ файла в UploadStore; сам файл лежит на диске
+    upload = UPLOADS.get(st.session_state.get('csv_upload'))
+    if upload is None:
+        if st.session_state.pop('csv_upload', None) is not None:
+            st.warning("Загруженный файл удален после долгого простоя, загрузите его повторно")
+        uploaded_file = st.file_uploader(
+            "Загрузите файл с данными об автомобилях (CSV, Parquet или Arrow IPC)", 
+            type=UPLOAD_TYPES,
+            help=f"Файл должен содержать колонки: {', '.join(required_cols)}. "
+                 "Из Parquet и Arrow читаются только эти колонки, результат сохраняется в формате загруженного файла",
+            key=f"csv_uploader_{st.session_state.get('csv_uploader_n', 0)}"
+        )
+        if uploaded_file is None:
+            return
         try:
-            df_csv = pd.read_csv(uploaded_file)
-            
-            required_cols = ['name', 'fuel', 'transmission', 'owner', 'seats']
-            missing_cols = [col for col in required_cols if col not in df_csv.columns]
-            
-            if missing_cols:
-                st.error(f"В загруженном файле отсутствуют обязательные колонки: {', '.join(missing_cols)}")
-            else:
-                st.success(f"✅ Успешно загружено {len(df_csv)} записей")
-                
-                with st.expander("📋 Просмотр загруженных данных"):
-                    st.dataframe(df_csv.head())
-                
-                if st.button("🚀 Начать прогнозирование", type="primary"):
-                    st.session_state['processing_mode'] = True
-                    st.session_state['df_csv'] = df_csv.to_dict()
-                    st.rerun()
-        
+            key = UPLOADS.put(uploaded_file, uploaded_file.name)
         except Exception as e:
             st.error(f"Ошибка при чтении файла: {str(e)}")
+            return
+        # Новый ключ виджета сбрасывает загрузчик, и Streamlit освобождает файл в памяти
+        st.session_state['csv_upload'] = key
+        st.session_state['csv_uploader_n'] = st.session_state.get('csv_uploader_n', 0) + 1
+        st.rerun()
 
-    if st.session_state.get('processing_mode', False):
-        st.divider()
-        st.subheader("Обработка прогнозов")
-        
-        df_csv = pd.DataFrame(st.session_state['df_csv'])
-        
-        with st.spinner("Обрабатываю данные..."):
-            try:
-                pred = get_pred(df_csv, model_type)
-                
-                results_df = df_csv.copy()
-                results_df['predicted_price'] = pred
-                
-                st.success(f"✅ Прогнозы готовы для {len(results_df)} записей")
-                st.dataframe(results_df[['name', 'predicted_price']], use_container_width=True)
-                
-                csv = results_df.to_csv(index=False).encode('utf-8')
-                st.download_button(
-                    label="📥 Скачать результаты в CSV",
-                    data=csv,
-                    file_name='predictions.csv',
-                    mime='text/csv'
-                )
-                
-            except Exception as e:
-                st.error(f"Ошибка при обработке данных: {str(e)}")
-                st.info("Проверьте формат данных в CSV файле")
+    st.caption(f"Файл **{upload['name']}**")
+    # Схема и число строк посчитаны при сохранении файла, CSV хранится как Parquet
+    missing_cols = [col for col in required_cols if col not in upload['columns']]
+    if missing_cols:
+        st.error(f"В загруженном файле отсутствуют обязательные колонки: {', '.join(missing_cols)}")
+    else:
+        st.success(f"✅ Успешно загружено {upload['rows']} записей")
+
+        with st.expander("📋 Просмотр загруженных данных"):
+            st.dataframe(read_head(upload['path'], upload['stored_format'], 5,
+                                   None if upload['format'] == 'csv' else required_cols))
+
+        explain = st.checkbox("Объяснить прогнозы: вклад каждого поля в цену каждой записи", key="csv_explain")
+        if st.button("🚀 Начать прогнозирование", type="primary"):
+            job_id = JOBS.submit(upload['path'], model_type, name=upload['name'], out_format=upload['format'],
+                                 explain=explain)
+            st.session_state['csv_job'] = job_id
+            st.query_params['job'] = job_id
+            st.rerun()
+
+    if st.button("Загрузить другой файл", key="new_csv_upload"):
+        st.session_state.pop('csv_upload', None)
+        st.rerun()
 
 def session_model_1():
     st.success("Вы выбрали **Модель 1**")
@@ -79,19 +196,21 @@ def session_model_1():
     owner = st.selectbox("Владелец", ['First Owner', 'Second Owner', 'Third Owner', 'Fourth & Above Owner', 'Test Drive Car'])
     seats = st.number_input("Посадочные места", min_value=2, max_value=160, value=5)
 
-    df = pd.DataFrame({
-        'name': [name],
-        'fuel': [fuel],
-        'transmission': [transmission],
-        'owner': [owner],
-        'seats': [seats]
-    })
+    record = {
+        'name': name,
+        'fuel': fuel,
+        'transmission': transmission,
+        'owner': owner,
+        'seats': seats
+    }
 
     single_prediction, csv_prediction = pred_session_buttoms_choice()
 
     if single_prediction:
-        pred = get_pred(df, 'model1')
-        show_pred(pred)
+        from Scoring import get_pred_cached
+        pred = get_pred_cached(record, 'model1')
+        show_pred([pred])
+    lazy_expander("🧩 Из чего сложилась цена", "explain_model_1", lambda: explain_block(record, 'model1'))
     if csv_prediction:
         st.session_state['csv_mode'] = True
         st.rerun()
@@ -118,27 +237,30 @@ def session_model_2():
     torque = st.text_input("Мощность", "190Nm@ 2000rpm")
     seats = st.number_input("Посадочные места", min_value=2, max_value=160, value=5)
 
-    df = pd.DataFrame({
-        'name': [name],
-        'year': [year],
-        'km_driven': [km_driven],
-        'age': [age],
-        'fuel': [fuel],
-        'seller_type': [seller_type],
-        'transmission': [transmission],
-        'owner': [owner],
-        'mileage': [mileage],
-        'engine': [engine],
-        'max_power': [max_power],
-        'torque': [torque],
-        'seats': [seats]
-    })
+    record = {
+        'name': name,
+        'year': year,
+        'km_driven': km_driven,
+        'age': age,
+        'fuel': fuel,
+        'seller_type': seller_type,
+        'transmission': transmission,
+        'owner': owner,
+        'mileage': mileage,
+        'engine': engine,
+        'max_power': max_power,
+        'torque': torque,
+        'seats': seats
+    }
 
     single_prediction, csv_prediction = pred_session_buttoms_choice()
 
     if single_prediction:
-        pred = get_pred(df, 'model2')
-        show_pred(pred)
+        from Scoring import get_pred_cached
+        pred = get_pred_cached(record, 'model2')
+        show_pred([pred])
+    lazy_expander("🧩 Из чего сложилась цена", "explain_model_2", lambda: explain_block(record, 'model2'))
+    lazy_expander("📈 Как меняется цена", "sweep_model_2", lambda: sweep_block(record, 'model2'))
     if csv_prediction:
         st.session_state['csv_mode'] = True
         st.rerun()
@@ -148,13 +270,11 @@ def session_model_2():
 
 def session_viz_1():
     st.success("Вы выбрали **Модель 1**")
-    with open('app/graphs/weights_model1.pickle', 'rb') as f:
-        fig = pickle.load(f)
+    fig = load_figure('app/graphs/weights_model1.json')
     st.plotly_chart(fig, use_container_width=True)
 
 def session_viz_2():
     st.success("Вы выбрали **Модель 2**")
-    with open('app/graphs/weights_model2.pickle', 'rb') as f:
-        fig = pickle.load(f)
+    fig = load_figure('app/graphs/weights_model2.json')
     st.plotly_chart(fig, use_container_width=True)
     
@@ -1,6 +1,7 @@
 import streamlit as st
-from DataPreparation import preparation_for_model_1, preparation_for_model_2
-import pickle
+import Profiling
+
+# pandas, plotly и Scoring импортируются при первом использовании, чтобы не замедлять старт приложения
 
 def get_diff(metric1, metric2):
     r2 = round(metric1[0] - metric2[0], 2)
@@ -30,25 +31,29 @@ def show_pred(pred):
         st.write(f"К сожалению, наш оракул сомневается в правильности введенных Вами параметрами, пожалуйста," \
                     " **перепроверьте корректность введенных Вами данных**")
 
-def get_pred(df, model_name):
-    if model_name == 'model1':
-        correct_df = preparation_for_model_1(df, 
-                                        'app/models/model1/model1_features.pickle', 
-                                        'app/models/model1/model1_ohe.pickle',
-                                        'app/models/model1/model1_ohe_features.pickle')
-        model_path = 'app/models/model1/model1.pickle'
-
-    elif model_name == 'model2':
-        correct_df = preparation_for_model_2(df,
-                                                'app/models/model2/model2_features.pickle',
-                                                'app/models/model2/model2_IQRbounds.pickle',
-                                                'app/models/model2/model2_meanNumCol.pickle'
-                                                )
-        model_path = 'app/models/model2/model2.pickle'
-    with open(model_path, 'rb') as f:
-        model = pickle.load(f)
-    return model.predict(correct_df)
+def explain_block(record, model_name):
+    # Из чего сложилась цена одной записи: от свободного члена модели через вклады полей к прогнозу
+    # Рисуется только в раскрытом экспандере; повтор той же записи берется из кэша прогнозов
+    import plotly.graph_objects as go
+    from Scoring import BASE_COLUMN, FIELD_LABELS, get_explanation_cached
 
+    pred, contributions = get_explanation_cached(record, model_name)
+    contributions = dict(contributions)
+    base = contributions.pop(BASE_COLUMN)
+    fields = sorted((f for f in contributions if contributions[f] != 0), key=lambda f: -abs(contributions[f]))
+    fig = go.Figure(go.Waterfall(
+        x=[FIELD_LABELS[BASE_COLUMN]] + [FIELD_LABELS.get(f, f) for f in fields] + ["Цена"],
+        y=[base] + [contributions[f] for f in fields] + [pred],
+        measure=['absolute'] + ['relative'] * len(fields) + ['total'],
+    ))
+    fig.update_layout(yaxis_title="₽", showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption("База - цена при средних числовых значениях и первых категориях обучающей выборки; "
+               "столбцы - насколько каждое поле сдвигает цену от базы")
+    unused = [FIELD_LABELS.get(f, f) for f in contributions if contributions[f] == 0]
+    if unused:
+        # Первая категория признака или поле, которое модель не использует (владелец у модели 2)
+        st.caption(f"Не сдвигают цену от базы: {', '.join(unused)}")
 
 def pred_session_buttoms_choice():
     col_btn1, col_btn2 = st.columns(2)
@@ -60,9 +65,140 @@ def pred_session_buttoms_choice():
     
     return single_prediction, csv_prediction
 
+def _sweep_axis(spec, param):
+    # Поля одной оси; ключи зависят от параметра, поэтому при смене параметра подставляются его значения
+    if spec['kind'] == 'choice':
+        return {'values': st.multiselect(spec['label'], spec['values'], default=spec['values'], key=f"sweep_{param}")}
+    start, stop, steps = spec['default']
+    number = int if spec.get('integer') else float
+    col_a, col_b, col_c = st.columns(3)
+    return {
+        'start': col_a.number_input(f"{spec['label']}: от", value=number(start), key=f"sweep_{param}_start"),
+        'stop': col_b.number_input("до", value=number(stop), key=f"sweep_{param}_stop"),
+        'steps': col_c.number_input("точек", min_value=2, max_value=1000, value=steps, key=f"sweep_{param}_steps"),
+    }
+
+def _sweep_figure(result, axes, params):
+    import plotly.express as px
+
+    names = list(axes)
+    labels = {param: params[param]['label'] for param in names}
+    labels['predicted_price'] = "Цена, ₽"
+    choices = [param for param in names if params[param]['kind'] == 'choice']
+    if len(names) == 1:
+        plot = px.bar if choices else px.line
+        return plot(result, x=names[0], y='predicted_price', labels=labels)
+    if not choices:
+        # Две числовые оси - тепловая карта: по x первая, по y вторая
+        table = result.pivot(index=names[1], columns=names[0], values='predicted_price')
+        return px.imshow(table, origin='lower', aspect='auto', color_continuous_scale='Viridis',
+                         labels={'x': labels[names[0]], 'y': labels[names[1]], 'color': labels['predicted_price']})
+    # Категория - цвет линии (или группа столбцов, если обе оси категориальные)
+    color = choices[-1]
+    x = [param for param in names if param != color][0]
+    plot = px.bar if params[x]['kind'] == 'choice' else px.line
+    return plot(result, x=x, y='predicted_price', color=color, labels=labels,
+                **({'barmode': 'group'} if plot is px.bar else {}))
+
+def sweep_block(record, model_name):
+    # Как меняется цена по одному-двум параметрам при остальных значениях из формы:
+    # вся сетка сценариев считается одним прогнозом
+    import time
+    from Scoring import SWEEP_PARAMS, run_sweep, sweep_values
+
+    params = SWEEP_PARAMS[model_name]
+    col_x, col_y = st.columns(2)
+    x = col_x.selectbox("Параметр", list(params), format_func=lambda p: params[p]['label'], key="sweep_x")
+    y = col_y.selectbox("Второй параметр", [None] + [p for p in params if p != x],
+                        format_func=lambda p: "—" if p is None else params[p]['label'], key="sweep_y")
+    with st.form("sweep_form", border=False):
+        inputs = {param: _sweep_axis(params[param], param) for param in (x, y) if param is not None}
+        submitted = st.form_submit_button("Построить", type="primary")
+    if not submitted:
+        return
+
+    try:
+        axes = {param: sweep_values(model_name, param, **fields) for param, fields in inputs.items()}
+        start = time.perf_counter()
+        result = run_sweep(record, axes, model_name)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    st.caption(f"{len(result)} сценариев за {(time.perf_counter() - start) * 1000:.0f} мс")
+    st.plotly_chart(_sweep_figure(result, axes, params), use_container_width=True)
+
+def profiling_session():
+    # Профилирование - настройка сессии: свой флажок и свои трассы, другие пользователи их не видят.
+    # Вызывается в начале сценария, до любых прогнозов
+    if "profiling_session" not in st.session_state:
+        st.session_state["profiling_session"] = Profiling.new_session()
+    Profiling.activate(st.session_state["profiling_session"])
+
+def _apply_profiling():
+    session = st.session_state["profiling_session"]
+    session['enabled'] = st.session_state["profiling"]
+    session['memory'] = session['enabled'] and st.session_state.get("profiling_memory", False)
+
+def profiling_sidebar():
+    # Время этапов последнего прогноза этой сессии; без включенного флажка замеры не ведутся
+    session = st.session_state["profiling_session"]
+    with st.sidebar:
+        enabled = st.toggle("Профилирование этапов", value=session['enabled'], key="profiling",
+                            on_change=_apply_profiling)
+        st.checkbox("Учитывать память (медленнее)", value=session['memory'], key="profiling_memory",
+                    disabled=not enabled, on_change=_apply_profiling)
+        if not enabled:
+            return
+
+        import pandas as pd
+        from Scoring import PRED_CACHE
+
+        cache = PRED_CACHE.stats()
+        st.caption(f"Кэш прогнозов: {cache['hits']} попаданий из {cache['hits'] + cache['misses']} "
+                   f"({cache['hit_rate']:.0%}), записей {cache['size']}")
+        from DataPreparation.utils import parse_stats
+        numeric_stats = parse_stats()
+        if numeric_stats:
+            # Разбор mileage/engine/max_power: строки по единицам, пропуски и ошибки за время работы
+            st.caption("Разбор чисел с единицами")
+            st.dataframe(pd.DataFrame(numeric_stats).T.fillna(0).astype(int),
+                         use_container_width=True)
+        trace = Profiling.last_trace()
+        if trace is None:
+            st.caption("Сделайте прогноз, чтобы увидеть время этапов")
+            return
+        st.markdown(f"**{trace['trace']}**: {trace['rows']} строк, {trace['seconds'] * 1000:.1f} мс")
+        df_trace = pd.DataFrame(trace['stages'])
+        df_trace['stage'] = ['\u00a0\u00a0' * d + s.rsplit('/', 1)[-1] for d, s in zip(df_trace['depth'], df_trace['stage'])]
+        df_trace['ms'] = (df_trace['seconds'] * 1000).round(2)
+        columns = ['stage', 'rows', 'ms'] + (['mem_delta_mb'] if 'mem_delta_mb' in df_trace else [])
+        st.dataframe(df_trace[columns], hide_index=True, use_container_width=True)
+
+
+# ---- Статичные ресурсы: читаются один раз на процесс ----
+@st.cache_resource(show_spinner=False)
+def load_image(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+@st.cache_resource(show_spinner=False)
+def load_figure(path):
+    # JSON готовит python -m app.build_assets из pickle-файлов с графиками
+    import plotly.io as pio
+
+    with open(path) as f:
+        return pio.from_json(f.read())
+
+def lazy_expander(label, key, block):
+    # Содержимое рисуется только у раскрытого экспандера
+    expander = st.expander(label, expanded=False, key=key, on_change="rerun")
+    with expander:
+        if expander.open:
+            block()
+
 
 def paiplot_block():
-    st.image("app/graphs/pairplot_train.png", caption="Попарное распределение")
+    st.image(load_image("app/graphs/pairplot_train.png"), caption="Попарное распределение")
     st.markdown("---")
     st.markdown("#### Зависимости на графиках scatter")
     with st.container(border=True):
@@ -125,7 +261,7 @@ def paiplot_block():
         """)
 
 def heatmap_block():
-    st.image("app/graphs/hetmap_train.png", caption="Корреляционная карта")
+    st.image(load_image("app/graphs/hetmap_train.png"), caption="Корреляционная карта")
     st.markdown("---")
     st.markdown("#### Анализ корреляций между признаками")
     with st.container(border=True):
@@ -192,7 +328,7 @@ def heatmap_block():
         """)
 
 def phik_block():
-    st.image("app/graphs/phik_train.png", caption="Phi-k корреляционная карта (нелинейные зависимости)")
+    st.image(load_image("app/graphs/phik_train.png"), caption="Phi-k корреляционная карта (нелинейные зависимости)")
     st.markdown("---")
     st.markdown("#### Анализ нелинейных корреляций (φk)")
     with st.container(border=True):
@@ -223,8 +359,8 @@ def phik_block():
         """)
 
 def boxplot_block():
-    st.image("app/graphs/boxplot_km.png", caption="Ящик с усами для пробега")
-    st.image("app/graphs/violin_price.png", caption="Виолончель для цены")
+    st.image(load_image("app/graphs/boxplot_km.png"), caption="Ящик с усами для пробега")
+    st.image(load_image("app/graphs/violin_price.png"), caption="Виолончель для цены")
 
     st.markdown("---")
     st.markdown("#### 📊 Анализ распределений и выбросов")
@@ -243,7 +379,7 @@ def boxplot_block():
         """)
 
 def scatter_block():
-    st.image("app/graphs/scatter_price_owner.png", caption="Диаграмма рассеяния для цены и количества владельцев")
+    st.image(load_image("app/graphs/scatter_price_owner.png"), caption="Диаграмма рассеяния для цены и количества владельцев")
     st.markdown("---")
     st.markdown("#### Анализ владельцев автомобилей")
     with st.container(border=True):
@@ -295,7 +431,7 @@ def scatter_block():
                 st.caption("Особая категория")
 
 def distribution_block():
-    st.image("app/graphs/distributions_train_num.png", caption="Графики распределения числовых признаков")
+    st.image(load_image("app/graphs/distributions_train_num.png"), caption="Графики распределения числовых признаков")
     st.markdown("---")
     st.markdown("#### Анализ распределения признаков")
     with st.container(border=True):
@@ -1,13 +1,19 @@
-import pickle
 import numpy as np
 import pandas as pd
+from ModelStore import load_artifact, registry
+from Profiling import stage
 from .utils import parse_name_series
-from .utils import create_new_features, new_features, fill_outliers, log_col, astype_numeric, apply_split_torque
+from .utils import new_features, numeric_features_model_2, NUM_FEATURES_MODEL_2
+from .Parallel import sharded
 
 def preparation_cat(df_features):
-    df_cat = parse_name_series(df_features['name'])
+    with stage('parse_name', len(df_features)):
+        df_cat = parse_name_series(df_features['name'])
+    df_cat.index = df_features.index
     df_cat['drive'] = df_cat['drive'].map({'4X2': '2WD', '4X4': '4WD'})
     df_cat = df_cat.replace({None: np.nan, '': np.nan})
+    # Объем всегда float ('1200.0', как при обучении), иначе строка зависит от пропусков в соседних строках
+    df_cat['engine_displacement'] = df_cat['engine_displacement'].astype('float')
     df_cat.drop(['fuel', 'transmission'], axis=1, inplace=True)
     df_cat = pd.concat([df_cat, 
                         df_features[['fuel', 'transmission', 'owner', 'seats']]], 
@@ -15,54 +21,77 @@ def preparation_cat(df_features):
 
     return df_cat
 
+def _cat_features_model_1(df_features):
+    df_cat = preparation_cat(df_features)
+
+    with stage('cat_astype', len(df_cat)):
+        df_cat = df_cat.astype('str')
+        df_cat['engine_displacement'] = df_cat['engine_displacement'].astype('float')
+        df_cat['is_sport'] = df_cat['is_sport'].astype('int')
+        df_cat['seats'] = df_cat['seats'].astype('int')
+
+    return df_cat
+
+def _ohe_column_index(ohe, model_features):
+    # Позиции признаков модели в выходе OHE; None, если порядок уже совпадает
+    position = {name: i for i, name in enumerate(ohe.get_feature_names_out())}
+    columns = np.array([position[name] for name in model_features], dtype=np.intp)
+    if len(columns) == len(position) and (columns == np.arange(len(columns))).all():
+        return None
+    return columns
+
+@sharded
 def preparation_for_model_1(df_features, model_features_names_path, ohe_path, ohe_features_names_path):
-    with open(ohe_features_names_path, 'rb') as f:
-        ohe_features = pickle.load(f)
-    with open(ohe_path, 'rb') as f:
-        ohe = pickle.load(f)
-    with open(model_features_names_path, 'rb') as f:
-        model_features = pickle.load(f)
+    with stage('preparation_for_model_1', len(df_features)):
+        with stage('load_artifacts'):
+            ohe = load_artifact(ohe_path)
+            model_features = load_artifact(model_features_names_path)
 
-    df_cat = preparation_cat(df_features)
+        df_cat = _cat_features_model_1(df_features)
 
-    df_cat = df_cat.astype('str')
-    df_cat['engine_displacement'] = df_cat['engine_displacement'].astype('float')
-    df_cat['is_sport'] = df_cat['is_sport'].astype('int')
-    df_cat['seats'] = df_cat['seats'].astype('int')
-    
-    df_cat_ohe = ohe.transform(df_cat)
-    df_cat_ohe = pd.DataFrame(df_cat_ohe.toarray(),
-                                  index=df_cat.index,
-                                  columns=ohe.get_feature_names_out())
-    
-    return df_cat_ohe[model_features]
+        with stage('ohe', len(df_cat)):
+            df_cat_ohe = ohe.transform(df_cat)
+            df_cat_ohe = pd.DataFrame(df_cat_ohe.toarray(),
+                                          index=df_cat.index,
+                                          columns=ohe.get_feature_names_out())
 
+            return df_cat_ohe[model_features]
+
+@sharded
+def preparation_for_model_1_sparse(df_features, model_features_names_path, ohe_path, ohe_features_names_path):
+    # То же, что preparation_for_model_1, но CSR-матрица в порядке признаков модели без уплотнения
+    with stage('preparation_for_model_1_sparse', len(df_features)):
+        with stage('load_artifacts'):
+            ohe = load_artifact(ohe_path)
+            columns = registry.derive('ohe_columns', [ohe_path, model_features_names_path], _ohe_column_index)
+
+        df_cat = _cat_features_model_1(df_features)
+
+        with stage('ohe', len(df_cat)):
+            df_cat_ohe = ohe.transform(df_cat).tocsr()
+            if columns is not None:
+                df_cat_ohe = df_cat_ohe[:, columns]
+
+        return df_cat_ohe
+
+@sharded
 def preparation_for_model_2(df_features, model_features_names_path, model_IQRbounds_path, model_meanNum_path):
-    df_features = astype_numeric(df_features, ['mileage', 'engine', 'max_power'], float)
-    df_features = apply_split_torque(df_features)
-    with open(model_IQRbounds_path, 'rb') as f:
-        train_bounds = pickle.load(f)
-    with open(model_features_names_path, 'rb') as f:
-        model_features = pickle.load(f)
-    with open(model_meanNum_path, 'rb') as f:
-        meanNum = pickle.load(f)
-
-    num_columns = ['year', 'km_driven', 'mileage', 'engine', 'max_power', 'torque', 'max_torque_rpm']
-    df_num = df_features[num_columns]
-
-    df_num = create_new_features(df_num)
-    
-    for col in df_num:
-        df_num[col] = df_num[col].fillna(meanNum[col])   
-              
-    df_num = fill_outliers(df_num, train_bounds)
-    df_num = log_col(df_num)
-    
-    df_bool = new_features(df_features[['owner']])
-
-    df_cat = preparation_cat(df_features).astype('str')
-
-    df_all = pd.concat((df_num, df_bool, df_cat), axis=1)
-
-    return df_all[model_features]
+    n = len(df_features)
+    with stage('preparation_for_model_2', n):
+        with stage('load_artifacts'):
+            train_bounds = load_artifact(model_IQRbounds_path)
+            model_features = load_artifact(model_features_names_path)
+            meanNum = load_artifact(model_meanNum_path)
+
+        with stage('numeric', n):
+            df_num = pd.DataFrame(numeric_features_model_2(df_features, meanNum, train_bounds),
+                                  index=df_features.index, columns=NUM_FEATURES_MODEL_2, copy=False)
+
+        with stage('owner_features', n):
+            df_bool = new_features(df_features[['owner']])
+
+        df_cat = preparation_cat(df_features)
+        with stage('assemble', n):
+            df_all = pd.concat((df_num, df_bool, df_cat.astype('str')), axis=1)
 
+            return df_all[model_features]
@@ -0,0 +1,85 @@
+import functools
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ModelStore import load_artifact
+from Profiling import stage
+
+# Параллельная подготовка признаков: кадр делится на части по строкам, части готовятся
+# в пуле процессов и склеиваются в исходном порядке.
+#   APP_PREP_SHARDS   - число частей (и процессов); 0 или 1 - без пула (по умолчанию)
+#   APP_PREP_MIN_ROWS - меньшие кадры всегда готовятся в текущем процессе
+_config = {
+    'shards': int(os.environ.get('APP_PREP_SHARDS', '0')),
+    'min_rows': int(os.environ.get('APP_PREP_MIN_ROWS', '50000')),
+}
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def configure(shards=None, min_rows=None):
+    if shards is not None:
+        _config['shards'] = shards
+    if min_rows is not None:
+        _config['min_rows'] = min_rows
+
+
+def get_config():
+    return dict(_config)
+
+
+def _init_worker(artifact_paths):
+    # Артефакты загружаются один раз при старте процесса; в самом процессе части не делятся
+    configure(shards=1)
+    for path in artifact_paths:
+        load_artifact(path)
+
+
+def _get_pool(shards, artifact_paths):
+    # Пул на каждое число частей живет весь процесс; артефакты другой модели
+    # загрузятся в процессах пула при первой ее части
+    with _pools_lock:
+        pool = _pools.get(shards)
+        if pool is None:
+            pool = ProcessPoolExecutor(shards, initializer=_init_worker, initargs=(artifact_paths,))
+            _pools[shards] = pool
+        return pool
+
+
+def shutdown():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(cancel_futures=True)
+        _pools.clear()
+
+
+def _concat(parts):
+    if isinstance(parts[0], pd.DataFrame):
+        return pd.concat(parts)
+    import scipy.sparse as sp
+    return sp.vstack(parts, format='csr')
+
+
+def sharded(prepare):
+    # prepare(df_features, *artifact_paths) получает параметры shards и min_rows;
+    # по умолчанию берутся из configure() / переменных окружения
+    @functools.wraps(prepare)
+    def wrapper(df_features, *artifact_paths, shards=None, min_rows=None):
+        shards = _config['shards'] if shards is None else shards
+        min_rows = _config['min_rows'] if min_rows is None else min_rows
+        n = len(df_features)
+        if shards <= 1 or n < max(min_rows, shards):
+            return prepare(df_features, *artifact_paths)
+
+        with stage(f'sharded[{prepare.__name__}]', n):
+            pool = _get_pool(shards, artifact_paths)
+            bounds = np.linspace(0, n, shards + 1).astype(int)
+            futures = [pool.submit(wrapper, df_features.iloc[lo:hi], *artifact_paths, shards=1)
+                       for lo, hi in zip(bounds[:-1], bounds[1:])]
+            return _concat([f.result() for f in futures])
+
+    return wrapper
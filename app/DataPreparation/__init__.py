@@ -1 +1 @@
-from .GetCorrectData import preparation_for_model_1, preparation_for_model_2
\ No newline at end of file
+from .GetCorrectData import preparation_for_model_1, preparation_for_model_1_sparse, preparation_for_model_2
\ No newline at end of file
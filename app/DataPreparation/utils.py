@@ -1,6 +1,9 @@
 import pandas as pd
 import re
+import threading
 import numpy as np
+from collections import Counter
+from .cache import LRUCache
 
 #==== MODEL 1 ====
 
@@ -75,6 +78,19 @@ SERIES_PATTERNS = [
     r'\b([0-9]\s+Series)\b'
 ]
 
+# Слова, которые не относятся к названию модели
+TECH_WORDS = set([
+    'diesel', 'petrol', 'cng', 'lpg', 'hybrid', 'electric', 'ev',
+    'amt', 'automatic', 'auto', 'at', 'mt', 'dsg', 'cvt', 'manual',
+    'suv', 'sedan', 'hatchback', 'hatch', 'muv', 'mpv', 'van', 'coupe',
+    'convertible', 'wagon', 'estate', 'crossover',
+] + TRIM_KEYWORDS)
+
+DRIVE_WORDS = ['4x4', '4x2', '2wd', '4wd']
+
+NAME_COLUMNS = ['brand', 'drive', 'model', 'fuel', 'engine_displacement', 'is_sport',
+                'transmission', 'body_type', 'trim', 'emission_norm', 'series']
+
 # ===== Вспомогательные функции =====
 
 def find_fuel(name_lower: str):
@@ -179,21 +195,15 @@ def parse_name(name: str):
     emission_norm = find_emission_norm(name_lower)
     drive = find_drive(name_lower)
     series = find_series(name_stripped)
-    tech_words = set([
-        'diesel', 'petrol', 'cng', 'lpg', 'hybrid', 'electric', 'ev',
-        'amt', 'automatic', 'auto', 'at', 'mt', 'dsg', 'cvt', 'manual',
-        'suv', 'sedan', 'hatchback', 'hatch', 'muv', 'mpv', 'van', 'coupe',
-        'convertible', 'wagon', 'estate', 'crossover',
-    ] + TRIM_KEYWORDS)
 
     model_tokens = []
     for t in rest.split():
         t_clean = re.sub(r'[^A-Za-z0-9]', '', t).lower()
-        if t_clean in tech_words:
+        if t_clean in TECH_WORDS:
             continue
         if re.match(r'bs[0-9ivx]+', t_clean):
             continue
-        if t_clean in ['4x4', '4x2', '2wd', '4wd']:
+        if t_clean in DRIVE_WORDS:
             continue
         model_tokens.append(t)
 
@@ -213,9 +223,193 @@ def parse_name(name: str):
         'series': series,
     }
 
+# ===== Колоночный парсер =====
+# Те же правила, что и в parse_name, но для всей колонки сразу
+
+_TOKEN_CHARS = r'A-Za-z0-9+'
+_TRANSMISSION_TOKEN_RE = re.compile(
+    r'(?<![' + _TOKEN_CHARS + r'])(' + '|'.join(map(re.escape, TRANSMISSION_KEYWORDS)) +
+    r')(?![' + _TOKEN_CHARS + r'])')
+_SPORT_RE = re.compile('|'.join(map(re.escape, SPORT_KEYWORDS)))
+_TRIM_RE = re.compile(r'\b(' + '|'.join(map(re.escape, TRIM_KEYWORDS)) + r')\b')
+_EMISSION_RES = [re.compile(pat) for pat in EMISSION_PATTERNS]
+_DRIVE_RES = [re.compile(pat) for pat in DRIVE_PATTERNS]
+_SERIES_RES = [re.compile(pat) for pat in SERIES_PATTERNS]
+_LITERS_RE = re.compile(r'(\d\.\d)')
+_CC_RE = re.compile(r'(\d{3,4})\s*(?:cc|cm3|cc\.?)')
+_NOT_ALNUM_RE = re.compile(r'[^A-Za-z0-9]')
+_EMISSION_TOKEN_RE = re.compile(r'bs[0-9ivx]+')
+
+
+def _substring_re(keywords):
+    # Перекрывающийся поиск: в каждой позиции находится первый по порядку ключ
+    return re.compile('(?=(' + '|'.join(map(re.escape, keywords)) + '))')
+
+
+_FUEL_RE = _substring_re(FUEL_KEYWORDS)
+_BODY_RE = _substring_re(BODY_KEYWORDS)
+_TRANSMISSION_RE = _substring_re(TRANSMISSION_KEYWORDS)
+
+
+def _first_by_priority(text, pattern, keywords):
+    # Значение ключа, который раньше всех стоит в справочнике, среди всех найденных
+    priority = {k: i for i, k in enumerate(keywords)}
+    values = list(keywords.values())
+    result = np.full(len(text), None, dtype=object)
+    for i, hits in enumerate(text.str.findall(pattern)):
+        if hits:
+            result[i] = values[min(priority[h] for h in hits)]
+    return result
+
+
+def _first_extract(text, patterns):
+    # group(1) первого по порядку паттерна, у которого есть совпадение
+    result = np.full(len(text), None, dtype=object)
+    pending = np.ones(len(text), dtype=bool)
+    for pattern in patterns:
+        if not pending.any():
+            break
+        idx = np.flatnonzero(pending)
+        found = text.iloc[idx].str.extract(pattern, expand=False)
+        mask = found.notna().to_numpy()
+        result[idx[mask]] = found[mask].to_numpy(dtype=object)
+        pending[idx[mask]] = False
+    return result
+
+
+def _engine_displacement_columns(lower):
+    result = np.full(len(lower), None, dtype=object)
+    liters = lower.str.extract(_LITERS_RE, expand=False)
+    mask = liters.notna().to_numpy()
+    result[mask] = [int(round(float(x) * 1000)) for x in liters[mask]]
+
+    idx = np.flatnonzero(~mask)
+    cc = lower.iloc[idx].str.extract(_CC_RE, expand=False)
+    cc_mask = cc.notna().to_numpy()
+    result[idx[cc_mask]] = [int(x) for x in cc[cc_mask]]
+    return result
+
+
+def _emission_norm_columns(lower):
+    result = _first_extract(lower, _EMISSION_RES)
+    mask = np.array([x is not None for x in result], dtype=bool)
+    if mask.any():
+        val = (pd.Series(result[mask], dtype=object).str.upper()
+               .str.replace('III', '3', regex=False)
+               .str.replace('IV', '4', regex=False)
+               .str.replace('VI', '6', regex=False))
+        has_digit = val.str.contains(r'[0-9]').to_numpy(dtype=bool)
+        digits = val.str.replace(r'[^0-9]', '', regex=True)
+        result[mask] = ('BS' + digits.where(has_digit, val)).to_numpy(dtype=object)
+    return result
+
+
+def _is_model_token(token):
+    t_clean = _NOT_ALNUM_RE.sub('', token).lower()
+    return not (t_clean in TECH_WORDS or _EMISSION_TOKEN_RE.match(t_clean) or t_clean in DRIVE_WORDS)
+
+
+def _model_columns(tokens):
+    # Токены всех строк одним массивом; фильтр считается один раз на уникальный токен
+    lengths = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(tokens))
+    flat = [t for row in tokens for t in row]
+    first = np.zeros(len(flat), dtype=bool)
+    first[(np.cumsum(lengths) - lengths)[lengths > 0]] = True
+
+    codes, uniques = pd.factorize(np.asarray(flat, dtype=object))
+    keep = np.fromiter((_is_model_token(t) for t in uniques), dtype=bool, count=len(uniques))
+    keep = keep[codes] & ~first
+
+    rows = np.repeat(np.arange(len(tokens)), lengths)[keep]
+    kept = [t for t, k in zip(flat, keep) if k]
+    starts = np.searchsorted(rows, np.arange(len(tokens)), side='left')
+    ends = np.searchsorted(rows, np.arange(len(tokens)), side='right')
+    return np.array([' '.join(kept[a:b]) if b > a else None for a, b in zip(starts, ends)],
+                    dtype=object)
+
+
+def _parse_name_values(values):
+    # Разбор массива названий в сырые значения колонок (None/int, как в parse_name)
+    is_str = np.fromiter((isinstance(x, str) for x in values), dtype=bool, count=len(values))
+
+    stripped = pd.Series(values[is_str], dtype=object).str.strip()
+    lower = stripped.str.lower()
+    tokens = [name.split() for name in stripped]
+    brand = np.array([t[0] if t else None for t in tokens], dtype=object)
+
+    transmission = np.full(len(lower), None, dtype=object)
+    token_match = lower.str.extract(_TRANSMISSION_TOKEN_RE, expand=False)
+    mask = token_match.notna().to_numpy()
+    transmission[mask] = token_match[mask].map(TRANSMISSION_KEYWORDS).to_numpy(dtype=object)
+    idx = np.flatnonzero(~mask)
+    transmission[idx] = _first_by_priority(lower.iloc[idx], _TRANSMISSION_RE, TRANSMISSION_KEYWORDS)
+
+    drive = _first_extract(lower, _DRIVE_RES)
+    drive = np.array([x.upper() if x is not None else None for x in drive], dtype=object)
+
+    parsed = {
+        'brand': brand,
+        'drive': drive,
+        'model': _model_columns(tokens),
+        'fuel': _first_by_priority(lower, _FUEL_RE, FUEL_KEYWORDS),
+        'engine_displacement': _engine_displacement_columns(lower),
+        'is_sport': lower.str.contains(_SPORT_RE).to_numpy(dtype=bool).astype(int),
+        'transmission': transmission,
+        'body_type': _first_by_priority(lower, _BODY_RE, BODY_KEYWORDS),
+        'trim': _first_by_priority(lower, _TRIM_RE, {kw: kw.upper() for kw in TRIM_KEYWORDS}),
+        'emission_norm': _emission_norm_columns(lower),
+        'series': _first_extract(stripped, _SERIES_RES),
+    }
+
+    # Не строки разбираются так же, как в parse_name: все пусто, is_sport = 0
+    columns = {}
+    for col in NAME_COLUMNS:
+        full = np.full(len(values), 0 if col == 'is_sport' else None, dtype=object)
+        full[is_str] = parsed[col]
+        columns[col] = full
+    return columns
+
+
+def parse_name_columns(s: pd.Series) -> pd.DataFrame:
+    columns = _parse_name_values(np.asarray(s, dtype=object))
+    return pd.DataFrame({col: columns[col].tolist() for col in NAME_COLUMNS}, columns=NAME_COLUMNS)
+
+
+# Кэш разобранных названий живет весь процесс, поэтому повторные названия
+# (в том числе одиночные прогнозы из форм) не разбираются заново
+NAME_CACHE = LRUCache(maxsize=100000)
+
+
+def _name_key(name):
+    return name.strip() if isinstance(name, str) else None
+
+
 def parse_name_series(s: pd.Series) -> pd.DataFrame:
-    parsed = s.apply(parse_name)
-    return pd.DataFrame(list(parsed))
+    codes, uniques = pd.factorize(np.asarray(s, dtype=object), use_na_sentinel=False)
+    uniques = np.asarray(uniques, dtype=object)
+
+    rows = np.empty((len(uniques), len(NAME_COLUMNS)), dtype=object)
+    missing = []
+    for i, name in enumerate(uniques):
+        key = _name_key(name)
+        cached = NAME_CACHE.get(key) if key is not None else None
+        if cached is None:
+            missing.append(i)
+        else:
+            rows[i] = cached
+
+    if missing:
+        parsed = _parse_name_values(uniques[missing])
+        parsed = np.column_stack([parsed[col] for col in NAME_COLUMNS])
+        rows[missing] = parsed
+        for i, row in zip(missing, parsed):
+            key = _name_key(uniques[i])
+            if key is not None:
+                NAME_CACHE.put(key, tuple(row))
+
+    rows = rows[codes]
+    return pd.DataFrame({col: rows[:, j].tolist() for j, col in enumerate(NAME_COLUMNS)},
+                        columns=NAME_COLUMNS)
 
 
 # ==== MODEL 2 ====
@@ -229,13 +423,101 @@ def split_x(x, format=float):
         except:
             return np.nan
     
+# ---- Числа с единицами измерения ----
+# Множитель к единице, в которой обучалась модель (kmpl, CC, bhp); '' - число без единицы.
+# km/kg (CNG, LPG) переводится в kmpl бензинового эквивалента по теплоте сгорания:
+# 1 кг газа (~47 МДж) - примерно 1.4 л бензина (~33 МДж)
+KM_PER_KG_TO_KMPL = 1 / 1.4
+NUMERIC_UNITS = {
+    'mileage': {'': 1.0, 'kmpl': 1.0, 'km/l': 1.0, 'kml': 1.0, 'km/kg': KM_PER_KG_TO_KMPL, 'mpg': 0.425144},
+    'engine': {'': 1.0, 'cc': 1.0, 'cm3': 1.0, 'l': 1000.0, 'litre': 1000.0, 'liter': 1000.0},
+    'max_power': {'': 1.0, 'bhp': 1.0, 'hp': 1.0, 'ps': 0.98632, 'kw': 1.34102},
+}
+_UNIT_NUMBER_RE = re.compile(r'^\s*(?P<value>[-+]?(?:\d{1,3}(?:,\d{3})+(?:\.\d*)?|\d+(?:\.\d*)?|\.\d+)(?:e[-+]?\d+)?)'
+                             r'\s*(?P<unit>[a-z][a-z0-9/]*)?(?:[\s@(\[,;].*)?$')
+
+# Статистика разбора за время жизни процесса: колонка -> Counter(rows, missing, failed, unit:<ед.>).
+# Пишут задачи, микробатчер и сессии из разных потоков - только под _parse_stats_lock, читать через parse_stats()
+NUMERIC_PARSE_STATS = {}
+_parse_stats_lock = threading.Lock()
+
+
+def parse_numeric_units(s, col=None):
+    # Значение и единица из всей колонки одним проходом регулярного выражения (RE2 в pyarrow)
+    # по уникальным значениям. Текст после единицы ('21 kmpl (ARAI)', '74 bhp@4000rpm') отбрасывается,
+    # как раньше в split_x. Неизвестная единица или текст без числа - NaN (дальше заполняется
+    # средним) и счетчик failed; пустая строка или одна единица без числа (' bhp') - пропуск
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    units = NUMERIC_UNITS.get(col)
+    # Пропуски получают код -1 и последний элемент values (NaN)
+    codes, uniques = pd.factorize(s if isinstance(s, pd.Series) else np.asarray(s, dtype=object))
+    uniques = np.asarray(uniques, dtype=object)
+    values = np.full(len(uniques) + 1, np.nan)
+    # Номер единицы в names для каждого уникального значения: -1 - пропуск, -2 - ошибка разбора
+    unit_code = np.full(len(uniques), -1, dtype=np.intp)
+    names = list(units) if units is not None else ['']
+
+    if isinstance(s, pd.Series) and pd.api.types.is_string_dtype(s.dtype) and s.dtype != object:
+        is_str = np.ones(len(uniques), dtype=bool)
+    else:
+        is_str = np.array([isinstance(x, str) for x in uniques], dtype=bool)
+        is_num = np.array([isinstance(x, (int, float, np.number)) and not isinstance(x, bool)
+                           for x in uniques], dtype=bool)
+        values[:-1][is_num] = uniques[is_num].astype(np.float64)
+        unit_code[is_num & ~np.isnan(values[:-1])] = 0
+
+    idx = np.flatnonzero(is_str)
+    if len(idx):
+        text = pc.utf8_lower(pa.array(uniques[idx], type=pa.string()))
+        found = pc.extract_regex(text, _UNIT_NUMBER_RE.pattern)
+        matched = found.is_valid().to_numpy(zero_copy_only=False)
+        # У несовпавших строк поле value пустое, а не null
+        value = pc.replace_substring(found.field('value'), ',', '')
+        number = pc.cast(pc.if_else(found.is_valid(), value, None), pa.float64())
+        unit = found.field('unit')
+        if units is None:
+            names += [u for u in pc.unique(pc.filter(unit, found.is_valid())).to_pylist() if u != '']
+        code = pc.index_in(unit, value_set=pa.array(names, type=pa.string())).fill_null(-1).to_numpy()
+        factor = np.array([units[u] if units is not None else 1.0 for u in names], dtype=np.float64)
+        ok = matched & (code >= 0)
+        values[idx[ok]] = number.to_numpy(zero_copy_only=False)[ok] * factor[code[ok]]
+        unit_code[idx[ok]] = code[ok]
+        blank = pc.is_in(pc.utf8_trim_whitespace(text),
+                         value_set=pa.array(['', 'nan', 'null', 'none'] + names, type=pa.string()))
+        unit_code[idx[~ok & ~blank.to_numpy(zero_copy_only=False)]] = -2
+
+    # Отчет по строкам колонки, а не по уникальным значениям
+    counts = np.bincount(codes + 1, minlength=len(uniques) + 1)[1:]
+    parsed = unit_code >= 0
+    per_unit = np.bincount(unit_code[parsed], weights=counts[parsed], minlength=len(names))
+    report = Counter(rows=len(codes), failed=int(counts[unit_code == -2].sum()))
+    report['missing'] = len(codes) - report['failed'] - int(per_unit.sum())
+    for name, n in zip(names, per_unit):
+        if n:
+            report[f'unit:{name or "-"}'] += int(n)
+    return values[codes], report
+
+
+def record_parse_stats(col, report):
+    with _parse_stats_lock:
+        NUMERIC_PARSE_STATS.setdefault(col, Counter()).update(report)
+
+
+def parse_stats():
+    # Копия статистики на момент вызова
+    with _parse_stats_lock:
+        return {col: dict(report) for col, report in NUMERIC_PARSE_STATS.items()}
+
+
 def astype_numeric(df_orig, col_names, format):
     df = df_orig.copy()
-    if isinstance(col_names, list):
-        for col_name in col_names:
-            df[col_name] = df[col_name].apply(split_x, format=format)
-    else:
-        df[col_names] = df[col_names].apply(split_x, format=format)
+    for col_name in (col_names if isinstance(col_names, list) else [col_names]):
+        values, report = parse_numeric_units(df[col_name], col_name)
+        record_parse_stats(col_name, report)
+        df[col_name] = values if format is float else pd.Series(values, index=df.index).map(
+            lambda x: format(x) if not np.isnan(x) else np.nan)
 
     return df
 
@@ -307,11 +589,79 @@ def split_torque(x):
 
     return float(torque), float(max_torque)
 
+# ---- Колоночный разбор torque ----
+# Каждая ветка повторяет соответствующую ветку split_torque (в том же порядке) и
+# принимает только строки, которые split_torque гарантированно разбирает так же.
+# Все остальное уходит в split_torque как есть.
+KGM_TO_NM = 9.80665
+
+_NUM = r'[0-9]+(?:\.[0-9]+)?'
+_RPM = r'[0-9][0-9,]*'
+_INNER = r'\( *' + _NUM + r' *(?:kgm|nm)? *\)'
+_TORQUE_BRANCHES = [
+    # (ветка, паттерн, множитель для torque)
+    ('a', r'(?P<a_t>' + _NUM + r')(?:nm)?@ (?P<a_r>' + _RPM + r')\+/-[0-9]+(?:rpm|\(nm@ rpm\))?', 1.0),
+    ('b', r'(?P<b_t>' + _NUM + r') *nm@ (?:' + _RPM + r' *[-~] *)?(?P<b_r>' + _RPM + r') *rpm', 1.0),
+    ('c', r'(?P<c_t>' + _NUM + r')@ (?:' + _RPM + r'-)?(?P<c_r>' + _RPM + r')\(kgm@ rpm\)', KGM_TO_NM),
+    ('d', r'(?P<d_t>' + _NUM + r')kgm@ (?:' + _RPM + r'-(?P<d_r>[0-9]+)|(?P<d_f>' + _NUM + r'))rpm', KGM_TO_NM),
+    ('e', r' *(?P<e_t>' + _NUM + r') * kgm at +(?:' + _RPM + r' *- *)?(?P<e_r>' + _RPM + r') *rpm', KGM_TO_NM),
+    ('f', r' *(?P<f_t>' + _NUM + r') *nm at +(?:' + _RPM + r' *- *)?(?P<f_r>' + _RPM + r') *rpm *', 1.0),
+    ('g', r'(?P<g_t>' + _NUM + r')(?: *nm *' + _INNER + r'| *' + _INNER + r'| *nm +| *)@ (?:' + _RPM +
+          r' *- *(?P<g_r>[0-9]+)|(?P<g_f>' + _NUM + r')) *rpm', 1.0),
+    ('h', r' *(?P<h_t>' + _NUM + r') *nm *', 1.0),
+    ('i', r' *(?P<i_t>' + _NUM + r') / (?P<i_r>' + _NUM + r') *', 1.0),
+]
+_TORQUE_RE = re.compile(r'^(?:' + '|'.join(pat for _, pat, _ in _TORQUE_BRANCHES) + r')\Z')
+
+
+def parse_torque_columns(s):
+    # Разбор каждого уникального значения один раз, затем раскладка по строкам
+    codes, uniques = pd.factorize(np.asarray(s, dtype=object), use_na_sentinel=False)
+    uniques = np.asarray(uniques, dtype=object)
+    torque = np.full(len(uniques), np.nan)
+    rpm = np.full(len(uniques), np.nan)
+
+    idx = np.flatnonzero([isinstance(x, str) for x in uniques])
+    matches = [_TORQUE_RE.match(x.lower()) for x in uniques[idx]]
+    matched = np.array([m is not None for m in matches], dtype=bool)
+    groups = list(zip(*(m.groups() for m in matches if m is not None)))
+    rows = idx[matched]
+
+    for branch, _, factor in _TORQUE_BRANCHES:
+        if not groups:
+            break
+        cols = [i - 1 for name, i in _TORQUE_RE.groupindex.items() if name.startswith(branch + '_')]
+        values = np.array(groups[cols[0]], dtype=object)
+        mask = pd.notna(values)
+        if not mask.any():
+            continue
+        torque[rows[mask]] = values[mask].astype(float) * factor
+        for col in cols[1:]:
+            values = np.array(groups[col], dtype=object)
+            col_mask = pd.notna(values)
+            rpm[rows[col_mask]] = [float(x.replace(',', '')) for x in values[col_mask]]
+
+    for i in idx[~matched]:
+        torque[i], rpm[i] = split_torque(uniques[i])
+
+    return torque[codes], rpm[codes]
+
+def torque_parse_failures(s):
+    # Маска строк, на которых parse_torque_columns упадет (split_torque не разбирает значение)
+    codes, uniques = pd.factorize(np.asarray(s, dtype=object), use_na_sentinel=False)
+    failed = np.zeros(len(uniques), dtype=bool)
+    for i, x in enumerate(uniques):
+        if isinstance(x, str) and _TORQUE_RE.match(x.lower()) is None:
+            try:
+                split_torque(x)
+            except (ValueError, IndexError):
+                failed[i] = True
+    return failed[codes]
+
+
 def apply_split_torque(df_orig):
     df = df_orig.copy()
-    torque_values, rpm_values = zip(*df['torque'].apply(split_torque))
-    df['torque'] = torque_values
-    df['max_torque_rpm'] = rpm_values
+    df['torque'], df['max_torque_rpm'] = parse_torque_columns(df['torque'])
 
     return df
 
@@ -339,11 +689,50 @@ def fill_outliers(df_orig, bounds):
                               np.where(df[col] > upper_bound, upper_bound, 
                               df[col]))
         
-        return df
+    return df
     
 def log_col(df_orig):
     df = df_orig.copy()
     for col in ['km_driven', 'engine', 'max_power', 'torque', 'max_torque_rpm', 'horse*volume', 'year^2']:
         df[col] = np.log(df[col]+1e-6)
 
-    return df
\ No newline at end of file
+    return df
+
+
+# ---- Числовой блок модели 2 одним массивом ----
+NUM_FEATURES_MODEL_2 = ['km_driven', 'mileage', 'engine', 'max_power', 'torque', 'max_torque_rpm',
+                        'horse*volume', 'year^2']
+LOG_FEATURES_MODEL_2 = ['km_driven', 'engine', 'max_power', 'torque', 'max_torque_rpm', 'horse*volume', 'year^2']
+
+def numeric_features_model_2(df_features, mean_num, bounds):
+    # То же, что astype_numeric + apply_split_torque + create_new_features + fillna + fill_outliers + log_col,
+    # но без копий DataFrame: один массив (n, 8) в порядке NUM_FEATURES_MODEL_2, все шаги на месте.
+    # Колонки в Fortran-порядке, чтобы операции по колонке шли по непрерывной памяти
+    n = len(df_features)
+    out = np.empty((n, len(NUM_FEATURES_MODEL_2)), dtype=np.float64, order='F')
+    idx = {col: j for j, col in enumerate(NUM_FEATURES_MODEL_2)}
+
+    out[:, idx['km_driven']] = df_features['km_driven'].to_numpy(dtype=np.float64, na_value=np.nan)
+    for col in ['mileage', 'engine', 'max_power']:
+        out[:, idx[col]], report = parse_numeric_units(df_features[col], col)
+        record_parse_stats(col, report)
+    out[:, idx['torque']], out[:, idx['max_torque_rpm']] = parse_torque_columns(df_features['torque'])
+
+    np.multiply(out[:, idx['engine']], out[:, idx['max_power']], out=out[:, idx['horse*volume']])
+    year = out[:, idx['year^2']]
+    year[:] = df_features['year'].to_numpy(dtype=np.float64, na_value=np.nan)
+    np.square(year, out=year)
+
+    mean = np.array([mean_num[col] for col in NUM_FEATURES_MODEL_2], dtype=np.float64)
+    np.copyto(out, mean, where=np.isnan(out))
+
+    lower = np.array([bounds[col].iloc[0] for col in NUM_FEATURES_MODEL_2], dtype=np.float64)
+    upper = np.array([bounds[col].iloc[1] for col in NUM_FEATURES_MODEL_2], dtype=np.float64)
+    np.clip(out, lower, upper, out=out)
+
+    for col in LOG_FEATURES_MODEL_2:
+        values = out[:, idx[col]]
+        values += 1e-6
+        np.log(values, out=values)
+
+    return out
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import pickle
+
+import numpy as np
+
+# Формат для разделения артефактов между процессами: все массивы модели лежат в одном файле arrays.bin
+# и открываются через memmap (одна копия в page cache на все процессы), объекты scikit-learn/pandas
+# восстанавливаются из небольших pickle-скелетов, в которых массивы заменены ссылками на arrays.bin.
+MAPPED_INDEX = 'index.json'
+MAPPED_ARRAYS = 'arrays.bin'
+MAPPED_FORMAT = 1
+_ALIGN = 64
+
+
+class _ExportPickler(pickle.Pickler):
+    def __init__(self, file, arrays):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.arrays = arrays
+
+    def persistent_id(self, obj):
+        # Числовые массивы и массивы строк (словари категорий, имена признаков) уходят в arrays.bin
+        if type(obj) is not np.ndarray:
+            return None
+        if obj.dtype.kind in 'biuf':
+            self.arrays.append((np.ascontiguousarray(obj), 'numeric'))
+        elif obj.dtype == object and obj.size and all(type(x) is str for x in obj.flat):
+            self.arrays.append((obj.astype(str), 'str'))
+        else:
+            return None
+        return len(self.arrays) - 1
+
+
+class _MappedUnpickler(pickle.Unpickler):
+    def __init__(self, file, bundle):
+        super().__init__(file)
+        self.bundle = bundle
+
+    def persistent_load(self, pid):
+        return self.bundle.array(pid)
+
+
+def export_mapped(paths, out_dir):
+    # paths: {имя компонента: путь к исходному pickle}; возвращает версию (хэш исходных файлов)
+    os.makedirs(out_dir, exist_ok=True)
+    arrays, sources = [], {}
+    for name, path in paths.items():
+        with open(path, 'rb') as f:
+            data = f.read()
+        st = os.stat(path)
+        # Размер и время изменения - для проверки актуальности без чтения исходного файла
+        sources[name] = {'path': path, 'sha256': hashlib.sha256(data).hexdigest(), 'size': st.st_size,
+                         'mtime_ns': st.st_mtime_ns}
+        with open(os.path.join(out_dir, f'{name}.pickle'), 'wb') as f:
+            _ExportPickler(f, arrays).dump(pickle.loads(data))
+
+    specs, offset = [], 0
+    with open(os.path.join(out_dir, MAPPED_ARRAYS), 'wb') as f:
+        for array, kind in arrays:
+            offset = -(-offset // _ALIGN) * _ALIGN
+            f.seek(offset)
+            f.write(array.tobytes())
+            specs.append({'kind': kind, 'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset})
+            offset += array.nbytes
+
+    version = hashlib.sha256(''.join(sources[name]['sha256'] for name in sorted(sources)).encode()).hexdigest()[:12]
+    index = {'format': MAPPED_FORMAT, 'version': version, 'sources': sources, 'arrays': specs}
+    # Индекс пишется последним: по времени его изменения реестр понимает, что экспорт обновился
+    tmp_path = os.path.join(out_dir, MAPPED_INDEX + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_path, os.path.join(out_dir, MAPPED_INDEX))
+    return version
+
+
+class MappedBundle:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MAPPED_INDEX)) as f:
+            self.index = json.load(f)
+        self.sources = self.index['sources']
+        self.version = self.index['version']
+        arrays_path = os.path.join(path, MAPPED_ARRAYS)
+        self._buffer = np.memmap(arrays_path, dtype=np.uint8, mode='r') if os.path.getsize(arrays_path) else None
+
+    def array(self, i):
+        spec = self.index['arrays'][i]
+        # Строки остаются массивами фиксированной ширины (<U) без копии в object:
+        # OneHotEncoder и отбор колонок pandas работают с ними так же
+        return np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']), buffer=self._buffer,
+                          offset=spec['offset'])
+
+    def load(self, name):
+        with open(os.path.join(self.path, f'{name}.pickle'), 'rb') as f:
+            return _MappedUnpickler(f, self).load()
+
+    def mapped_bytes(self):
+        return 0 if self._buffer is None else self._buffer.nbytes
@@ -0,0 +1,273 @@
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from .Mapped import MAPPED_INDEX, MappedBundle, export_mapped
+
+logger = logging.getLogger(__name__)
+
+# ---- Артефакты моделей ----
+MODEL_BUNDLES = {
+    'model1': {
+        'model': 'app/models/model1/model1.pickle',
+        'features': 'app/models/model1/model1_features.pickle',
+        'ohe': 'app/models/model1/model1_ohe.pickle',
+        'ohe_features': 'app/models/model1/model1_ohe_features.pickle',
+    },
+    'model2': {
+        'model': 'app/models/model2/model2.pickle',
+        'features': 'app/models/model2/model2_features.pickle',
+        'IQRbounds': 'app/models/model2/model2_IQRbounds.pickle',
+        'meanNum': 'app/models/model2/model2_meanNumCol.pickle',
+    },
+}
+
+# Все артефакты модели одним файлом; собирается python -m app.build_assets
+PACKED_BUNDLES = {name: os.path.join(os.path.dirname(paths['model']), f'{name}_bundle.pickle')
+                  for name, paths in MODEL_BUNDLES.items()}
+BUNDLE_FORMAT = 1
+
+# Экспорт с массивами в memmap-файле, общий для всех процессов; собирается python -m app.build_assets
+MAPPED_BUNDLES = {name: os.path.join(os.path.dirname(paths['model']), 'mmap')
+                  for name, paths in MODEL_BUNDLES.items()}
+
+
+def file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def source_stamp(path):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+# Хэши исходных файлов, уже сверенных с бандлом: (путь, размер, время изменения) -> sha256
+_content_hashes = {}
+
+
+def is_fresh(path, source):
+    # Бандл собран из этого файла: совпали размер и время изменения (файл не читается) или,
+    # если время другое (git clone, копирование), хэш содержимого - он считается один раз на файл
+    try:
+        stamp = source_stamp(path)
+    except FileNotFoundError:
+        return False
+    if stamp['size'] != source['size']:
+        return False
+    if stamp['mtime_ns'] == source.get('mtime_ns'):
+        return True
+    key = (path, stamp['size'], stamp['mtime_ns'])
+    if key not in _content_hashes:
+        _content_hashes[key] = file_sha256(path)
+    return _content_hashes[key] == source['sha256']
+
+
+def pack_bundle(model_name, out_path=None):
+    # Исходные pickle хранятся байтами как есть: бандл не перепаковывает объекты scikit-learn
+    # и не зависит от его версии на машине сборки. Версия - хэш содержимого исходных файлов
+    out_path = out_path or PACKED_BUNDLES[model_name]
+    sources, payloads = {}, {}
+    for name, path in MODEL_BUNDLES[model_name].items():
+        with open(path, 'rb') as f:
+            payloads[name] = f.read()
+        sources[name] = {'path': path, 'sha256': hashlib.sha256(payloads[name]).hexdigest(),
+                         **source_stamp(path)}
+    version = hashlib.sha256(''.join(sources[name]['sha256'] for name in sorted(sources)).encode()).hexdigest()[:12]
+
+    bundle = {
+        'format': BUNDLE_FORMAT,
+        'model_name': model_name,
+        'version': version,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'sources': sources,
+        'payloads': payloads,
+    }
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, out_path)
+    return version
+
+
+def export_mapped_bundle(model_name, out_dir=None):
+    return export_mapped(MODEL_BUNDLES[model_name], out_dir or MAPPED_BUNDLES[model_name])
+
+
+def _is_mapped(array):
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base if isinstance(array.base, np.ndarray) else None
+    return False
+
+
+def estimate_size(obj, seen=None):
+    # Приблизительный объем объекта в памяти (байт), с учетом вложенных массивов
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        # Массивы из memmap лежат в page cache и не занимают память процесса
+        if _is_mapped(obj):
+            return 0
+        size = obj.nbytes
+        if obj.dtype == object:
+            size += sum(estimate_size(x, seen) for x in obj.ravel())
+        return size
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        return int(np.sum(obj.memory_usage(deep=True)))
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(k, seen) + estimate_size(v, seen)
+                                        for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_size(x, seen) for x in obj)
+    if hasattr(obj, '__dict__'):
+        return sys.getsizeof(obj) + estimate_size(vars(obj), seen)
+    return sys.getsizeof(obj)
+
+
+class ArtifactRegistry:
+    def __init__(self, loader=None):
+        self._loader = loader or self._unpickle
+        self._lock = threading.Lock()
+        self._path_locks = {}
+        self._entries = {}
+        self._derived = {}
+        self.use_mapped = os.environ.get('APP_MAPPED_BUNDLES', '1') != '0'
+        self.use_packed = os.environ.get('APP_PACKED_BUNDLES', '1') != '0'
+        # Путь компонента -> [(вид, путь бандла, имя компонента)] в порядке приоритета
+        self._bundle_sources = {
+            os.path.abspath(path): [('mapped', os.path.join(MAPPED_BUNDLES[model_name], MAPPED_INDEX), name),
+                                    ('packed', PACKED_BUNDLES[model_name], name)]
+            for model_name, paths in MODEL_BUNDLES.items() for name, path in paths.items()
+        }
+
+    @staticmethod
+    def _unpickle(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def _path_lock(self, key):
+        with self._lock:
+            if key not in self._path_locks:
+                self._path_locks[key] = threading.Lock()
+            return self._path_locks[key]
+
+    def _bundle_source(self, key):
+        enabled = {'mapped': self.use_mapped, 'packed': self.use_packed}
+        for source in self._bundle_sources.get(key, []):
+            if enabled[source[0]] and os.path.exists(source[1]):
+                return source
+        return None
+
+    def _mtime(self, key):
+        # Если рядом лежит только бандл (исходный файл не выкладывался), версия - время бандла
+        try:
+            return os.stat(key).st_mtime_ns
+        except FileNotFoundError:
+            source = self._bundle_source(key)
+            if source is None:
+                raise
+            return os.stat(source[1]).st_mtime_ns
+
+    def _load(self, key):
+        if os.path.basename(key) == MAPPED_INDEX:
+            return MappedBundle(os.path.dirname(key))
+
+        # Компонент берется из бандла (memmap или упакованного), если бандл собран из того же файла (is_fresh)
+        source = self._bundle_source(key)
+        if source is not None:
+            kind, bundle_path, name = source
+            bundle = self.get(bundle_path)
+            sources = bundle.sources if kind == 'mapped' else bundle['sources']
+            if not os.path.exists(key) or is_fresh(key, sources[name]):
+                return bundle.load(name) if kind == 'mapped' else pickle.loads(bundle['payloads'][name])
+            logger.warning("bundle %s is out of date for %s (rebuild with python -m app.build_assets), "
+                           "loading the file itself", bundle_path, key)
+        return self._loader(key)
+
+    def get(self, path):
+        key = os.path.abspath(path)
+        mtime = self._mtime(key)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry['mtime'] == mtime:
+            entry['hits'] += 1
+            return entry['obj']
+
+        # Загружаем не более одного раза на файл, даже при конкурентных запросах
+        with self._path_lock(key):
+            entry = self._entries.get(key)
+            if entry is not None and entry['mtime'] == mtime:
+                entry['hits'] += 1
+                return entry['obj']
+
+            start = time.perf_counter()
+            obj = self._load(key)
+            load_time = time.perf_counter() - start
+
+            loads = entry['loads'] + 1 if entry is not None else 1
+            self._entries[key] = {
+                'path': path,
+                'obj': obj,
+                'mtime': mtime,
+                'load_time': load_time,
+                'file_size': os.path.getsize(key) if os.path.exists(key) else 0,
+                'memory': estimate_size(obj),
+                'loads': loads,
+                'hits': 0,
+            }
+            logger.info("loaded artifact %s in %.1f ms (%d bytes in memory, load #%d)",
+                        path, load_time * 1000, self._entries[key]['memory'], loads)
+            return obj
+
+    def derive(self, name, paths, fn):
+        # Значение, вычисленное из артефактов; пересчитывается, если любой из файлов обновился
+        objs = [self.get(path) for path in paths]
+        keys = tuple(os.path.abspath(path) for path in paths)
+        stamp = tuple(self._entries[key]['mtime'] for key in keys)
+        cached = self._derived.get((name,) + keys)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        value = fn(*objs)
+        self._derived[(name,) + keys] = (stamp, value)
+        return value
+
+    def get_bundle(self, model_name):
+        return {name: self.get(path) for name, path in MODEL_BUNDLES[model_name].items()}
+
+    def bundle_version(self, model_name):
+        # Версия модели - времена изменения файлов бандла; меняется при замене любого артефакта
+        return tuple(self._mtime(os.path.abspath(path)) for path in MODEL_BUNDLES[model_name].values())
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._derived.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def report(self):
+        rows = [{k: v for k, v in entry.items() if k != 'obj'} for entry in self._entries.values()]
+        return pd.DataFrame(rows, columns=['path', 'load_time', 'file_size', 'memory',
+                                           'loads', 'hits', 'mtime'])
+
+
+registry = ArtifactRegistry()
+
+
+def load_artifact(path):
+    return registry.get(path)
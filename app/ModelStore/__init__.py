@@ -0,0 +1,3 @@
+from .Registry import (ArtifactRegistry, MODEL_BUNDLES, PACKED_BUNDLES, MAPPED_BUNDLES, registry, load_artifact,
+                       estimate_size, pack_bundle, export_mapped_bundle)
+from .Mapped import MappedBundle
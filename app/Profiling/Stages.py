@@ -0,0 +1,147 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger(__name__)
+
+# Включается через APP_PROFILE=1 или enable(); в выключенном состоянии stage() отдает
+# один и тот же пустой контекст без замеров
+_NULL = nullcontext()
+_state = {'enabled': os.environ.get('APP_PROFILE', '0') not in ('', '0'), 'memory': False}
+_local = threading.local()
+
+# Настройки сессии Streamlit (new_session/activate): свой флаг, учет памяти и свои трассы.
+# Действуют в потоке, который выполняет сценарий сессии; фоновые задачи и сервис живут по _state
+_session = contextvars.ContextVar('profiling_session', default=None)
+SESSION_TRACES = 20
+
+# tracemalloc общий на процесс: его включают профилирование и замер памяти в Scoring.Memory.
+# Счетчик пользователей под одной блокировкой; останавливается, только если его запустили здесь
+_trace_lock = threading.Lock()
+_trace = {'users': 0, 'owned': False}
+
+# Последние завершенные трассы вне сессий (внешний stage со всеми вложенными этапами)
+TRACES = deque(maxlen=100)
+
+
+def start_tracing():
+    with _trace_lock:
+        if _trace['users'] == 0:
+            _trace['owned'] = not tracemalloc.is_tracing()
+            if _trace['owned']:
+                tracemalloc.start()
+        _trace['users'] += 1
+
+
+def stop_tracing():
+    with _trace_lock:
+        if _trace['users'] == 0:
+            return
+        _trace['users'] -= 1
+        if _trace['users'] == 0 and _trace['owned']:
+            tracemalloc.stop()
+            _trace['owned'] = False
+
+
+@contextmanager
+def tracing():
+    # tracemalloc гарантированно работает внутри блока, что бы ни включали и ни выключали другие
+    start_tracing()
+    try:
+        yield
+    finally:
+        stop_tracing()
+
+
+def enable(flag=True, memory=False):
+    # Настройка процесса (CLI, задачи, сервис). memory=True - прирост памяти по этапам через tracemalloc,
+    # он работает только на время трассы
+    _state['enabled'] = flag
+    _state['memory'] = flag and memory
+
+
+def new_session():
+    # Настройки сессии; по умолчанию - как у процесса
+    return {'enabled': _state['enabled'], 'memory': _state['memory'], 'traces': deque(maxlen=SESSION_TRACES)}
+
+
+def activate(session):
+    # Настройки сессии для stage() в текущем потоке до следующего activate; None - настройки процесса
+    _session.set(session)
+
+
+def _settings():
+    session = _session.get()
+    return _state if session is None else session
+
+
+def is_enabled():
+    return _settings()['enabled']
+
+
+def stage(name, rows=None):
+    if not _settings()['enabled']:
+        return _NULL
+    return _stage(name, rows)
+
+
+@contextmanager
+def _stage(name, rows):
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    root = not stack
+    if root:
+        _local.records = []
+        _local.settings = _settings()
+        _local.memory = _local.settings['memory']
+        if _local.memory:
+            start_tracing()
+    records = _local.records
+
+    path = '/'.join(stack + [name])
+    record = {'stage': path, 'depth': len(stack), 'rows': rows}
+    records.append(record)
+    stack.append(name)
+    memory = _local.memory
+    mem_start = tracemalloc.get_traced_memory()[0] if memory else None
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        if memory:
+            record['mem_delta_mb'] = (tracemalloc.get_traced_memory()[0] - mem_start) / 2**20
+        stack.pop()
+        if root:
+            if memory:
+                stop_tracing()
+            _finish(records, _local.settings)
+
+
+def _finish(records, settings):
+    root = records[0]
+    trace = {
+        'trace': root['stage'],
+        'rows': root['rows'],
+        'seconds': root['seconds'],
+        'thread': threading.current_thread().name,
+        'stages': records,
+    }
+    settings.get('traces', TRACES).append(trace)
+    logger.info(json.dumps(trace, ensure_ascii=False))
+
+
+def last_trace():
+    traces = _settings().get('traces', TRACES)
+    return traces[-1] if traces else None
+
+
+def clear():
+    _settings().get('traces', TRACES).clear()
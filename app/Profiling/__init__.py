@@ -0,0 +1 @@
+from .Stages import TRACES, stage, enable, is_enabled, new_session, activate, last_trace, clear, tracing
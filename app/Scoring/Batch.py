@@ -0,0 +1,136 @@
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from DataPreparation.Parallel import configure as configure_preparation
+from ModelStore import registry
+from .Dedup import dedup_report
+from .Formats import ChunkWriter, detect_format, iter_chunks
+from .Memory import PeakMemory
+from .Predict import MODEL_INPUT_COLUMNS, get_pred_safe
+from .Stream import chunk_plan, explanations_frame, explanations_header
+from .Validate import ROW_ERROR_COLUMNS
+
+
+def _init_worker(model_name):
+    # Артефакты загружаются один раз при старте процесса; части уже параллельны, свой пул не нужен
+    configure_preparation(shards=1)
+    registry.get_bundle(model_name)
+
+
+def _score_chunk(model_name, chunk, dedup, explain=False):
+    start = time.perf_counter()
+    stats = Counter()
+    explanations = None
+    with PeakMemory() as peak:
+        if explain:
+            pred, errors, parts = get_pred_safe(chunk, model_name, dedup=dedup, stats=stats, explain=True)
+            explanations = explanations_frame(parts, pred)
+        else:
+            pred, errors = get_pred_safe(chunk, model_name, dedup=dedup, stats=stats)
+    return pred, errors, explanations, stats, time.perf_counter() - start, peak.report()['peak_mb']
+
+
+def score_csv_parallel(in_path, out_path, model_name, workers=None, chunksize=None,
+                       errors_path=None, dedup=True, budget_mb=None, explain_path=None):
+    # Части файла считаются в пуле процессов, результат пишется в исходном порядке и в формате
+    # входа (CSV, Parquet, Arrow IPC). Строки с ошибками получают пустой прогноз, отчет о них пишется в errors_path.
+    # Повторы строк убираются внутри каждой части (процессы пула не делят память).
+    # Без chunksize размер части подбирается под бюджет budget_mb на все процессы: в памяти одновременно
+    # до 2 * workers частей (очередь в основном процессе и части в работе).
+    # explain_path - CSV с вкладами полей в прогноз каждой строки
+    workers = workers or os.cpu_count() or 1
+    fmt = detect_format(in_path)
+    columns = MODEL_INPUT_COLUMNS[model_name] if fmt != 'csv' else None
+    start = time.perf_counter()
+    plan = chunk_plan(in_path, fmt, model_name, chunksize, budget_mb, parts=2 * workers)
+    chunksize = plan['chunk_size']
+    latencies = []
+    worker_peaks = []
+    dedup_stats = Counter()
+    rows = n_errors = 0
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_name,)) as pool, \
+            ChunkWriter(out_path, fmt) as out, \
+            open(errors_path or os.devnull, 'w', newline='', encoding='utf-8') as errors_out, \
+            open(explain_path or os.devnull, 'w', newline='', encoding='utf-8') as explain_out, \
+            PeakMemory() as peak:
+        pending = deque()
+        pd.DataFrame(columns=ROW_ERROR_COLUMNS).to_csv(errors_out, index=False)
+        if explain_path:
+            explanations_header(model_name).to_csv(explain_out, index=False)
+
+        def write_next():
+            nonlocal rows, n_errors
+            chunk, future = pending.popleft()
+            pred, errors, explanations, stats, latency, worker_peak = future.result()
+            dedup_stats.update(stats)
+            out.write(chunk, pred)
+            errors.to_csv(errors_out, index=False, header=False)
+            if explanations is not None:
+                explanations.to_csv(explain_out, index=False, header=False)
+            rows += len(chunk)
+            n_errors += errors['row'].nunique()
+            latencies.append(latency)
+            worker_peaks.append(worker_peak)
+
+        for chunk, table in iter_chunks(in_path, fmt, chunksize, columns):
+            future = pool.submit(_score_chunk, model_name, chunk, dedup, bool(explain_path))
+            pending.append((chunk if table is None else table, future))
+            # Ограничиваем число частей в памяти
+            if len(pending) >= 2 * workers:
+                write_next()
+        while pending:
+            write_next()
+
+    elapsed = time.perf_counter() - start
+    main_peak = peak.report()['peak_mb']
+    worker_peaks = [p for p in worker_peaks if p is not None]
+    latencies = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        'model': model_name,
+        'rows': rows,
+        'errors': n_errors,
+        'dedup': dedup_report(dedup_stats),
+        'chunks': len(latencies),
+        'workers': workers,
+        'chunk_size': chunksize,
+        'memory': dict(plan, peak_mb=main_peak, worker_peak_mb=max(worker_peaks) if worker_peaks else None),
+        'elapsed_s': elapsed,
+        'rows_per_s': rows / elapsed if elapsed > 0 else 0.0,
+        'chunk_latency_p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'chunk_latency_p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'chunk_latency_max_ms': float(latencies.max() * 1000),
+        'row_latency_us': float(latencies.sum() / rows * 1e6) if rows else 0.0,
+    }
+
+
+def _format_memory(memory):
+    mb = lambda value: f"{value:.0f} MB" if value is not None else "n/a"
+    plan = (f"budget {memory['budget_mb']} MB, ~{memory['row_bytes']} bytes/row"
+            + (" (over budget at minimum chunk size)" if memory['over_budget'] else "")
+            if memory['budget_mb'] else "fixed chunk size")
+    return f"{plan}; peak RSS main {mb(memory['peak_mb'])}, worker {mb(memory['worker_peak_mb'])}"
+
+
+def format_summary(stats):
+    dedup = stats['dedup']
+    return "\n".join([
+        f"model:            {stats['model']}",
+        f"rows:             {stats['rows']} in {stats['chunks']} chunks of {stats['chunk_size']}",
+        f"rows with errors: {stats['errors']}",
+        f"duplicates:       {dedup['rows'] - dedup['unique_rows']} rows ({dedup['duplicate_share']:.1%}), "
+        + (f"~{dedup['saved_s']:.2f} s of worker time saved" if dedup['saved_s'] >= 0
+           else f"hashing cost {-dedup['saved_s']:.2f} s"),
+        f"workers:          {stats['workers']}",
+        f"memory:           {_format_memory(stats['memory'])}",
+        f"wall time:        {stats['elapsed_s']:.2f} s",
+        f"throughput:       {stats['rows_per_s']:,.0f} rows/s",
+        f"chunk latency:    p50 {stats['chunk_latency_p50_ms']:.1f} ms, "
+        f"p99 {stats['chunk_latency_p99_ms']:.1f} ms, max {stats['chunk_latency_max_ms']:.1f} ms",
+        f"per-row latency:  {stats['row_latency_us']:.1f} us (worker time)",
+    ])
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from .Validate import ROW_ERROR_COLUMNS
+
+# Сколько уникальных строк помнит DedupMemo (16 байт на строку плюс ошибки)
+MEMO_MAX_ROWS = 5_000_000
+
+
+def row_groups(df, columns):
+    # Группы одинаковых строк по 64-битному хэшу колонок модели: номер группы для каждой строки,
+    # позиция первой строки и хэш каждой группы. Пропуски (NaN, None) хэшируются одинаково
+    hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    groups, uniques = pd.factorize(hashes)
+    # factorize нумерует группы в порядке появления: новая группа - номер больше всех предыдущих
+    seen = np.maximum.accumulate(groups)
+    first = np.flatnonzero(np.r_[True, groups[1:] > seen[:-1]])
+    return groups, first, np.asarray(uniques, dtype=np.uint64)
+
+
+def expand_errors(errors, groups, index):
+    # Ошибки уникальных строк (row - номер группы) размножаются на все строки группы
+    if errors.empty:
+        return errors
+    rows = pd.DataFrame({'group': groups, 'label': index})
+    errors = errors.rename(columns={'row': 'group'}).merge(rows, on='group')
+    return errors.drop(columns='group').rename(columns={'label': 'row'})[ROW_ERROR_COLUMNS]
+
+
+class DedupMemo:
+    # Прогнозы строк, уже посчитанных в предыдущих частях файла: отсортированные хэши и прогнозы,
+    # ошибки хранятся по хэшу. После max_rows новые строки не запоминаются
+    def __init__(self, max_rows=MEMO_MAX_ROWS):
+        self.max_rows = max_rows
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._pred = np.empty(0)
+        self._errors = {}
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def lookup(self, hashes):
+        # Маска известных хэшей, их прогнозы и ошибки (DataFrame, row - позиция в hashes)
+        if not len(self._hashes):
+            return np.zeros(len(hashes), dtype=bool), np.empty(0), []
+        pos = np.minimum(np.searchsorted(self._hashes, hashes), len(self._hashes) - 1)
+        known = self._hashes[pos] == hashes
+        errors = [dict(record, row=i) for i in np.flatnonzero(known)
+                  for record in self._errors.get(int(hashes[i]), ())] if self._errors else []
+        return known, self._pred[pos[known]], errors
+
+    def add(self, hashes, pred, errors):
+        # errors - DataFrame, row - позиция в hashes
+        room = self.max_rows - len(self._hashes)
+        if room <= 0:
+            return
+        hashes, pred = hashes[:room], pred[:room]
+        for row, records in errors[errors['row'] < len(hashes)].groupby('row'):
+            self._errors[int(hashes[row])] = records.drop(columns='row').to_dict('records')
+        merged = np.concatenate([self._hashes, hashes])
+        order = np.argsort(merged, kind='stable')
+        self._hashes = merged[order]
+        self._pred = np.concatenate([self._pred, pred])[order]
+
+
+def dedup_report(stats):
+    # stats - Counter с rows, unique_rows (посчитано моделью), dedup_s (хэширование) и score_s
+    rows, unique = stats.get('rows', 0), stats.get('unique_rows', 0)
+    per_row = stats.get('score_s', 0.0) / unique if unique else 0.0
+    return {
+        'rows': rows,
+        'unique_rows': unique,
+        'duplicate_share': 1 - unique / rows if rows else 0.0,
+        'saved_s': (rows - unique) * per_row - stats.get('dedup_s', 0.0),
+    }
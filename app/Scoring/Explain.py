@@ -0,0 +1,98 @@
+import numpy as np
+
+from ModelStore import MODEL_BUNDLES, registry
+
+# Вклады полей в прогноз линейной модели: coef_j * x_j по признакам, которые видит Ridge, сложенные
+# по входным полям одним умножением X @ W (W - коэффициенты, разложенные по столбцам полей).
+# base (свободный член) плюс вклады равны прогнозу. Числовые признаки модели 2 стандартизованы,
+# поэтому их вклад отсчитывается от среднего по обучающей выборке, категории - от первой категории
+# каждого признака (отброшенной при кодировании)
+BASE_COLUMN = 'base'
+
+# Признаки, которые подготовка выводит из входного поля с другим именем
+_FIELD_OF = {
+    'brand': 'name', 'drive': 'name', 'model': 'name', 'engine_displacement': 'name', 'is_sport': 'name',
+    'body_type': 'name', 'trim': 'name', 'emission_norm': 'name', 'series': 'name',
+    'year^2': 'year', 'max_torque_rpm': 'torque', 'FS_owner': 'owner', 'TF_owner': 'owner',
+    # Произведение объема и мощности - отдельное поле, его вклад не делится между двумя
+    'horse*volume': 'engine*max_power',
+}
+
+FIELD_LABELS = {
+    BASE_COLUMN: "База", 'name': "Название", 'year': "Год производства", 'km_driven': "Пробег",
+    'fuel': "Топливо", 'transmission': "Коробка передач", 'owner': "Владелец", 'mileage': "Потребление",
+    'engine': "Объем", 'max_power': "Мощность", 'engine*max_power': "Объем × мощность",
+    'torque': "Крутящий момент", 'seats': "Посадочные места",
+}
+
+
+def _ohe_inputs(ohe):
+    # Входная колонка OHE для каждого выходного столбца (drop='first' убирает по одному на колонку)
+    drop = ohe.drop_idx_ if ohe.drop_idx_ is not None else [None] * len(ohe.categories_)
+    sizes = [len(categories) - (index is not None) for categories, index in zip(ohe.categories_, drop)]
+    return np.repeat(np.asarray(ohe.feature_names_in_, dtype=object), sizes)
+
+
+def _column_transformer_inputs(transformer):
+    # То же для ColumnTransformer: по срезу выхода каждого преобразователя
+    inputs = np.empty(len(transformer.get_feature_names_out()), dtype=object)
+    for name, step, columns in transformer.transformers_:
+        output = transformer.output_indices_[name]
+        if output.stop == output.start:
+            continue
+        inputs[output] = _ohe_inputs(step) if hasattr(step, 'categories_') else columns
+    return inputs
+
+
+def _build(estimator, features, input_columns, transform=None):
+    import scipy.sparse as sp
+
+    fields = list(input_columns)
+    fields += [field for field in dict.fromkeys(_FIELD_OF.get(f, f) for f in features) if field not in fields]
+    index = {field: i for i, field in enumerate(fields)}
+    rows = np.arange(len(features))
+    cols = np.array([index[_FIELD_OF.get(f, f)] for f in features], dtype=np.intp)
+    coef = np.asarray(estimator.coef_, dtype=np.float64).ravel()
+    return {
+        'estimator': estimator,
+        'transform': transform,
+        'weights': sp.csr_matrix((coef, (rows, cols)), shape=(len(features), len(fields))),
+        'intercept': float(np.ravel(estimator.intercept_)[0]),
+        'columns': [BASE_COLUMN] + fields,
+    }
+
+
+def _model_1_explainer(input_columns):
+    def build(model, ohe, model_features):
+        # Выход OHE в порядке признаков модели, как в preparation_for_model_1_sparse
+        inputs = dict(zip(ohe.get_feature_names_out(), _ohe_inputs(ohe)))
+        return _build(model, [inputs[name] for name in model_features], input_columns)
+    return build
+
+
+def _model_2_explainer(input_columns):
+    def build(pipeline):
+        preprocessor = pipeline[:-1]
+        return _build(pipeline[-1], _column_transformer_inputs(preprocessor[-1]), input_columns,
+                      transform=preprocessor.transform)
+    return build
+
+
+def explainer(model_name, input_columns):
+    # Матрица весов по полям; пересчитывается, только если обновились файлы модели
+    paths = MODEL_BUNDLES[model_name]
+    if model_name == 'model1':
+        return registry.derive('explainer', [paths['model'], paths['ohe'], paths['features']],
+                               _model_1_explainer(input_columns))
+    return registry.derive('explainer', [paths['model']], _model_2_explainer(input_columns))
+
+
+def explain_prepared(prepared, model_name, input_columns):
+    # Прогноз и вклады (base и поля, колонки - explainer(...)['columns']) по подготовленным признакам:
+    # преобразование пайплайна делается один раз для прогноза и вкладов
+    exp = explainer(model_name, input_columns)
+    X = exp['transform'](prepared) if exp['transform'] is not None else prepared
+    parts = X @ exp['weights']
+    parts = parts.toarray() if hasattr(parts, 'toarray') else np.asarray(parts)
+    base = np.full((parts.shape[0], 1), exp['intercept'])
+    return exp['estimator'].predict(X), np.hstack([base, parts])
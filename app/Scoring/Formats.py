@@ -0,0 +1,164 @@
+import io
+import os
+
+import pandas as pd
+
+# Форматы пакетного прогноза. CSV читается целиком (все колонки попадают в результат),
+# Parquet и Arrow IPC - только колонки модели: через memory map и без разбора текста.
+# Результат пишется в формате входного файла.
+FORMATS = {
+    'csv': {'extensions': ['.csv'], 'mime': 'text/csv', 'label': 'CSV'},
+    'parquet': {'extensions': ['.parquet', '.pq'], 'mime': 'application/vnd.apache.parquet', 'label': 'Parquet'},
+    'arrow': {'extensions': ['.arrow', '.feather', '.ipc', '.arrows'],
+              'mime': 'application/vnd.apache.arrow.file', 'label': 'Arrow IPC'},
+}
+UPLOAD_TYPES = [ext.lstrip('.') for spec in FORMATS.values() for ext in spec['extensions']]
+
+
+def detect_format(name):
+    ext = os.path.splitext(str(name))[1].lower()
+    for fmt, spec in FORMATS.items():
+        if ext in spec['extensions']:
+            return fmt
+    raise ValueError(f"Неподдерживаемый формат файла: {ext or name}")
+
+
+def output_name(fmt, stem='predictions'):
+    return stem + FORMATS[fmt]['extensions'][0]
+
+
+def _arrow_source(source):
+    # Путь открывается через memory map, загруженный файл (BytesIO) - без копирования буфера
+    import pyarrow as pa
+
+    if isinstance(source, (str, os.PathLike)):
+        return pa.memory_map(os.fspath(source))
+    if isinstance(source, io.BytesIO):
+        return pa.BufferReader(pa.py_buffer(source.getbuffer()))
+    source.seek(0)
+    return pa.BufferReader(source.read())
+
+
+def _read_arrow_table(source, columns=None):
+    import pyarrow as pa
+
+    try:
+        table = pa.ipc.open_file(_arrow_source(source)).read_all()
+    except pa.ArrowInvalid:
+        # Потоковый формат IPC (.arrows)
+        table = pa.ipc.open_stream(_arrow_source(source)).read_all()
+    return table.select(columns) if columns is not None else table
+
+
+def _to_pandas(table):
+    return table.to_pandas(split_blocks=True)
+
+
+def read_schema(source, fmt):
+    # Имена колонок без чтения данных (для CSV - заголовок)
+    if fmt == 'csv':
+        columns = list(pd.read_csv(source, nrows=0).columns)
+    elif fmt == 'parquet':
+        import pyarrow.parquet as pq
+        columns = pq.ParquetFile(_arrow_source(source)).schema_arrow.names
+    else:
+        columns = _read_arrow_table(source).schema.names
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return columns
+
+
+def read_head(source, fmt, nrows, columns=None):
+    if fmt == 'csv':
+        df = pd.read_csv(source, nrows=nrows, usecols=columns)
+    elif fmt == 'parquet':
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(_arrow_source(source)).iter_batches(batch_size=nrows, columns=columns)
+        batch = next(batches, None)
+        df = batch.to_pandas() if batch is not None else pd.DataFrame(columns=columns)
+    else:
+        df = _to_pandas(_read_arrow_table(source, columns).slice(0, nrows))
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return df
+
+
+def count_rows(source, fmt):
+    if fmt == 'csv':
+        from .Stream import count_csv_rows
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                return count_csv_rows(f)
+        return count_csv_rows(source)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(_arrow_source(source)).metadata.num_rows
+    return _read_arrow_table(source).num_rows
+
+
+def iter_chunks(source, fmt, chunksize, columns=None):
+    # Пары (DataFrame для прогноза, исходный Arrow-блок или None для CSV)
+    if fmt == 'csv':
+        for chunk in pd.read_csv(source, chunksize=chunksize):
+            yield chunk, None
+    elif fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        offset = 0
+        for batch in pq.ParquetFile(_arrow_source(source)).iter_batches(batch_size=chunksize, columns=columns):
+            table = pa.Table.from_batches([batch])
+            df = _to_pandas(table)
+            df.index = pd.RangeIndex(offset, offset + len(df))
+            offset += len(df)
+            yield df, table
+    else:
+        table = _read_arrow_table(source, columns)
+        for offset in range(0, table.num_rows, chunksize):
+            part = table.slice(offset, chunksize)
+            df = _to_pandas(part)
+            df.index = pd.RangeIndex(offset, offset + len(df))
+            yield df, part
+
+
+class ChunkWriter:
+    # Пишет части результата: DataFrame для CSV, Arrow-таблицу для Parquet и Arrow IPC
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self._writer = None
+        self._file = open(path, 'w', newline='', encoding='utf-8') if fmt == 'csv' else None
+        self._rows = 0
+
+    def write(self, chunk, pred):
+        if self.fmt == 'csv':
+            chunk['predicted_price'] = pred
+            chunk.to_csv(self._file, index=False, header=(self._rows == 0))
+        else:
+            import pyarrow as pa
+            table = chunk.append_column('predicted_price', pa.array(pred, type=pa.float64()))
+            if self._writer is None:
+                self._writer = self._open(table.schema)
+            self._writer.write_table(table)
+        self._rows += len(chunk)
+
+    def _open(self, schema):
+        import pyarrow as pa
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.ParquetWriter(self.path, schema)
+        return pa.ipc.new_file(self.path, schema)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._writer is not None:
+            self._writer.close()
+        elif self.fmt != 'csv':
+            # Пустой вход: файл результата все равно создается
+            open(self.path, 'wb').close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
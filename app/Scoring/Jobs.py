@@ -0,0 +1,181 @@
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from .Dedup import dedup_report
+from .Formats import count_rows, detect_format, output_name
+from .Stream import score_stream
+
+logger = logging.getLogger(__name__)
+
+# Задачи живут в каталоге <JOBS_DIR>/<id>/: input.<ext>, predictions.<ext>, errors.csv, explanations.csv и status.json;
+# формат результата совпадает с форматом загруженного файла (CSV, Parquet, Arrow IPC)
+JOBS_DIR = os.environ.get('APP_JOBS_DIR', os.path.join(tempfile.gettempdir(), 'linearauto_jobs'))
+JOB_WORKERS = 2
+JOB_TTL = 24 * 3600
+ACTIVE_STATUSES = ('queued', 'running')
+_JOB_ID_RE = re.compile(r'[0-9a-f]{32}')
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobManager:
+    def __init__(self, jobs_dir=JOBS_DIR, workers=JOB_WORKERS, ttl=JOB_TTL):
+        self.jobs_dir = jobs_dir
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='csv-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _dir(self, job_id):
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _save(self, status):
+        path = os.path.join(self._dir(status['id']), 'status.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(status, f)
+        os.replace(path + '.tmp', path)
+
+    def submit(self, source, model_name, name='upload.csv', chunksize=None, out_format=None, explain=False):
+        # source - путь или файловый объект; вход копируется в каталог задачи (файл из UploadStore -
+        # жесткой ссылкой), поэтому задача не зависит от сессии Streamlit и от удаления загрузки.
+        # out_format - формат результата, если он отличается от формата source (CSV, сохраненный как Parquet).
+        # Без chunksize размер части подбирается под бюджет памяти (APP_MEMORY_BUDGET_MB).
+        # explain=True - рядом с результатом explanations.csv с вкладами полей в прогноз
+        fmt = detect_format(name if not isinstance(source, (str, os.PathLike)) else source)
+        out_format = out_format or fmt
+        self.cleanup()
+        job_id = uuid.uuid4().hex
+        job_dir = self._dir(job_id)
+        os.makedirs(job_dir)
+        in_path = os.path.join(job_dir, output_name(fmt, 'input'))
+        if isinstance(source, (str, os.PathLike)):
+            try:
+                os.link(source, in_path)
+            except OSError:
+                shutil.copyfile(source, in_path)
+        else:
+            source.seek(0)
+            with open(in_path, 'wb') as f:
+                shutil.copyfileobj(source, f)
+            source.seek(0)
+        total = count_rows(in_path, fmt)
+
+        status = {
+            'id': job_id,
+            'model': model_name,
+            'name': name,
+            'format': out_format,
+            'input_format': fmt,
+            'status': 'queued',
+            'rows_total': total,
+            'rows_done': 0,
+            'created': time.time(),
+            'started': None,
+            'finished': None,
+            'elapsed': None,
+            'error': None,
+            'errors': 0,
+            'dedup': None,
+            'memory': None,
+            'output': os.path.join(job_dir, output_name(out_format)),
+            'errors_output': os.path.join(job_dir, 'errors.csv'),
+            'explain_output': os.path.join(job_dir, 'explanations.csv') if explain else None,
+        }
+        job = {'status': status, 'cancel': threading.Event()}
+        with self._lock:
+            self._jobs[job_id] = job
+        self._save(status)
+        job['future'] = self._executor.submit(self._run, job, in_path, chunksize)
+        logger.info("job %s queued: %s, %d rows, %s", job_id, name, total, model_name)
+        return job_id
+
+    def _run(self, job, in_path, chunksize):
+        status = job['status']
+        if job['cancel'].is_set():
+            return
+        status.update(status='running', started=time.time())
+        self._save(status)
+
+        stats = Counter()
+        memory = {}
+
+        def on_progress(rows, elapsed, errors):
+            status.update(rows_done=rows, elapsed=elapsed, errors=errors, dedup=dedup_report(stats),
+                          memory=dict(memory))
+            self._save(status)
+            if job['cancel'].is_set():
+                raise JobCancelled()
+
+        try:
+            rows, elapsed, errors = score_stream(in_path, status['model'], status['output'],
+                                                 status.get('input_format', status['format']), chunksize=chunksize,
+                                                 out_fmt=status['format'], on_progress=on_progress,
+                                                 errors_path=status['errors_output'], stats=stats, memory=memory,
+                                                 explain_path=status.get('explain_output'))
+            status.update(status='done', rows_done=rows, elapsed=elapsed, errors=errors, dedup=dedup_report(stats),
+                          memory=dict(memory))
+        except JobCancelled:
+            status['status'] = 'cancelled'
+        except Exception as e:
+            logger.exception("job %s failed", status['id'])
+            status.update(status='failed', error=str(e))
+        status['finished'] = time.time()
+        self._save(status)
+        logger.info("job %s %s: %d rows, %d with errors, peak memory %s MB", status['id'], status['status'],
+                    status['rows_done'], status['errors'], memory.get('peak_mb'))
+
+    def get(self, job_id):
+        # Копия статуса; задачи прошлых запусков процесса читаются с диска
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return dict(job['status'])
+        if not isinstance(job_id, str) or not _JOB_ID_RE.fullmatch(job_id):
+            return None
+        path = os.path.join(self._dir(job_id), 'status.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            status = json.load(f)
+        if status['status'] in ACTIVE_STATUSES:
+            status.update(status='failed', error="Задача прервана перезапуском сервиса")
+        return status
+
+    def cancel(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None or job['status']['status'] not in ACTIVE_STATUSES:
+            return False
+        job['cancel'].set()
+        # Задача из очереди снимается сразу, запущенная остановится после текущего блока
+        future = job.get('future')
+        if future is not None and future.cancel():
+            job['status'].update(status='cancelled', finished=time.time())
+            self._save(job['status'])
+        return True
+
+    def cleanup(self):
+        # Удаляет завершенные задачи старше ttl
+        if not os.path.isdir(self.jobs_dir):
+            return
+        deadline = time.time() - self.ttl
+        for job_id in os.listdir(self.jobs_dir):
+            status = self.get(job_id)
+            if status is None or (status['status'] in ACTIVE_STATUSES and job_id in self._jobs):
+                continue
+            if (status['finished'] or status['created']) < deadline:
+                shutil.rmtree(self._dir(job_id), ignore_errors=True)
+                with self._lock:
+                    self._jobs.pop(job_id, None)
+
+
+JOBS = JobManager()
@@ -0,0 +1,111 @@
+import logging
+import os
+import threading
+import tracemalloc
+
+from Profiling import tracing
+
+from .Dedup import MEMO_MAX_ROWS
+from .Predict import get_pred_safe
+
+logger = logging.getLogger(__name__)
+
+# Бюджет памяти задачи: размер части подбирается по замеру памяти на строку на первых строках файла.
+#   APP_MEMORY_BUDGET_MB - бюджет в МБ (по умолчанию 512); 0 - фиксированный размер части
+MEMORY_BUDGET_MB = int(os.environ.get('APP_MEMORY_BUDGET_MB', '512'))
+WARMUP_ROWS = 2000
+MIN_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 200_000
+# Доля бюджета под DedupMemo: хэш и прогноз (16 байт) плюс временные копии при сортировке
+MEMO_SHARE = 0.1
+MEMO_ROW_BYTES = 48
+
+# Замеры по очереди: reset_peak общий для процесса
+_measure_lock = threading.Lock()
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def measure_row_cost(sample, model_name):
+    # Байт на строку: пик tracemalloc при валидации, подготовке и прогнозе пробной части плюс сами
+    # входные данные. tracemalloc замедляет прогноз раз в десять, поэтому замер только на пробе.
+    # None - замер не удался
+    get_pred_safe(sample.head(10), model_name, dedup=False)  # артефакты и кэши не входят в замер
+    with _measure_lock, tracing():
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        get_pred_safe(sample, model_name, dedup=False)
+        peak = tracemalloc.get_traced_memory()[1] - base
+    if peak <= 0:
+        logger.warning("memory measurement for %s failed (peak %d bytes)", model_name, peak)
+        return None
+    return (peak + int(sample.memory_usage(deep=True).sum())) / max(len(sample), 1)
+
+
+def plan_chunks(sample, model_name, budget_mb=None, parts=1):
+    # Размер части, при котором parts одновременно обрабатываемых частей укладываются в бюджет,
+    # и сколько строк может запомнить DedupMemo; None - замер не удался
+    budget_mb = MEMORY_BUDGET_MB if budget_mb is None else budget_mb
+    budget = budget_mb * 2**20
+    row_bytes = measure_row_cost(sample, model_name)
+    if row_bytes is None:
+        return None
+    chunk = int(budget * (1 - MEMO_SHARE) / parts / row_bytes)
+    plan = {
+        'budget_mb': budget_mb,
+        'row_bytes': round(row_bytes),
+        'chunk_size': min(max(chunk, MIN_CHUNK_SIZE), MAX_CHUNK_SIZE),
+        'memo_rows': min(MEMO_MAX_ROWS, int(budget * MEMO_SHARE / MEMO_ROW_BYTES)),
+        'over_budget': chunk < MIN_CHUNK_SIZE,
+    }
+    if plan['over_budget']:
+        logger.warning("memory budget %d MB is too small for %s: %d bytes per row, using %d-row chunks",
+                       budget_mb, model_name, row_bytes, MIN_CHUNK_SIZE)
+    return plan
+
+
+def rss_bytes():
+    # Текущий RSS процесса; None без /proc (не Linux)
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class PeakMemory:
+    # Пиковый RSS процесса за время блока: фоновый поток опрашивает /proc/self/statm.
+    # В отличие от tracemalloc видит и память pyarrow и почти не замедляет работу;
+    # при нескольких задачах в процессе - общий пик
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.start_bytes = self.peak_bytes = rss_bytes()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        current = rss_bytes()
+        if current is not None and current > self.peak_bytes:
+            self.peak_bytes = current
+        return self.peak_bytes
+
+    def report(self):
+        if self.peak_bytes is None:
+            return {'peak_mb': None, 'job_peak_mb': None}
+        self.sample()
+        return {'peak_mb': round(self.peak_bytes / 2**20, 1),
+                'job_peak_mb': round((self.peak_bytes - self.start_bytes) / 2**20, 1)}
+
+    def __enter__(self):
+        if self.start_bytes is not None:
+            self._thread = threading.Thread(target=self._poll, name='peak-memory', daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,106 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from .Predict import get_pred_safe
+
+
+def _size_bucket(n):
+    # 1, 2, 3-4, 5-8, ... - границы по степеням двойки
+    upper = 1 << max(n - 1, 0).bit_length()
+    lower = upper // 2 + 1 if upper > 1 else 1
+    return f"{lower}-{upper}" if lower != upper else str(upper)
+
+
+class MicroBatcher:
+    # Запросы, пришедшие в пределах max_wait_ms, объединяются в один вызов predict
+    def __init__(self, model_name, max_batch_size=256, max_wait_ms=5.0, history=10000):
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=history)
+        self._batch_sizes = Counter()
+        self._stats_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"batcher-{model_name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, records):
+        future = Future()
+        self._queue.put((records, future, time.perf_counter()))
+        return future
+
+    def predict(self, records, timeout=None):
+        return self.submit(records).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self._score(batch)
+            with self._stats_lock:
+                self._batch_sizes[sum(len(item[0]) for item in batch)] += 1
+
+    def _score(self, batch):
+        records = [record for item in batch for record in item[0]]
+        try:
+            pred, errors = get_pred_safe(pd.DataFrame(records), self.model_name)
+        except Exception as e:
+            # Исключение на весь батч: запросы пересчитываются по одному, чтобы упал только виновный
+            if len(batch) > 1:
+                for item in batch:
+                    self._score([item])
+            else:
+                batch[0][1].set_exception(e)
+            return
+
+        # Ошибочная запись роняет только свой запрос, остальные запросы батча получают прогноз
+        bad = errors.drop_duplicates('row').set_index('row')['message']
+        done = time.perf_counter()
+        offset = 0
+        for items, future, submitted in batch:
+            failed = bad[(bad.index >= offset) & (bad.index < offset + len(items))]
+            if len(failed):
+                future.set_exception(ValueError(f"record {failed.index[0] - offset}: {failed.iloc[0]}"))
+            else:
+                future.set_result(pred[offset:offset + len(items)].tolist())
+            offset += len(items)
+            with self._stats_lock:
+                self._latencies.append(done - submitted)
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = np.array(self._latencies)
+            sizes = Counter(self._batch_sizes)
+        buckets = Counter()
+        for size, count in sizes.items():
+            buckets[_size_bucket(size)] += count
+        return {
+            'model': self.model_name,
+            'requests': len(latencies),
+            'batches': sum(sizes.values()),
+            'latency_p50_ms': float(np.percentile(latencies, 50) * 1000) if len(latencies) else None,
+            'latency_p99_ms': float(np.percentile(latencies, 99) * 1000) if len(latencies) else None,
+            'mean_batch_size': (sum(s * c for s, c in sizes.items()) / sum(sizes.values())) if sizes else None,
+            'batch_size_distribution': dict(sorted(buckets.items(), key=lambda kv: int(kv[0].split('-')[0]))),
+        }
@@ -0,0 +1,173 @@
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from DataPreparation import preparation_for_model_1_sparse, preparation_for_model_2
+from DataPreparation.cache import TTLCache
+from ModelStore import MODEL_BUNDLES, load_artifact, registry
+from Profiling import stage
+from .Dedup import expand_errors, row_groups
+from .Explain import explain_prepared, explainer
+from .Validate import MAX_ISOLATED_ERRORS, errors_frame, validate_rows
+
+# Колонки входных данных, которые использует подготовка признаков каждой модели
+MODEL_INPUT_COLUMNS = {
+    'model1': ['name', 'fuel', 'transmission', 'owner', 'seats'],
+    'model2': ['name', 'year', 'km_driven', 'fuel', 'transmission', 'owner',
+               'mileage', 'engine', 'max_power', 'torque', 'seats'],
+}
+
+def get_pred(df, model_name, explain=False):
+    # explain=True - еще и вклады полей в прогноз (explain_prepared): пара (прогноз, матрица вкладов)
+    paths = MODEL_BUNDLES[model_name]
+    with stage(f'get_pred[{model_name}]', len(df)):
+        if model_name == 'model1':
+            correct_df = preparation_for_model_1_sparse(df, 
+                                            paths['features'], 
+                                            paths['ohe'],
+                                            paths['ohe_features'])
+
+        elif model_name == 'model2':
+            correct_df = preparation_for_model_2(df,
+                                                    paths['features'],
+                                                    paths['IQRbounds'],
+                                                    paths['meanNum']
+                                                    )
+        with stage('load_model'):
+            model = load_artifact(paths['model'])
+        with stage('predict', correct_df.shape[0]), warnings.catch_warnings():
+            # Модель 1 обучалась на DataFrame, а прогноз идет по CSR-матрице в том же порядке признаков;
+            # предупреждение глушится только на время этого вызова
+            warnings.filterwarnings('ignore', message='X does not have valid feature names', category=UserWarning)
+            if explain:
+                return explain_prepared(correct_df, model_name, MODEL_INPUT_COLUMNS[model_name])
+            return model.predict(correct_df)
+
+def explanation_columns(model_name):
+    return explainer(model_name, MODEL_INPUT_COLUMNS[model_name])['columns']
+
+# ---- Прогноз с изоляцией ошибочных строк ----
+def _predict_isolated(df, positions, model_name, pred, errors, budget, parts=None):
+    # Часть, на которой прогноз упал, делится пополам, пока ошибка не сведется к одной строке.
+    # parts - матрица вкладов полей, если нужны объяснения
+    try:
+        if parts is None:
+            pred[positions] = get_pred(df.iloc[positions], model_name)
+        else:
+            pred[positions], parts[positions] = get_pred(df.iloc[positions], model_name, explain=True)
+        return
+    except Exception as e:
+        if len(positions) > 1:
+            mid = len(positions) // 2
+            _predict_isolated(df, positions[:mid], model_name, pred, errors, budget, parts)
+            _predict_isolated(df, positions[mid:], model_name, pred, errors, budget, parts)
+            return
+        budget[0] -= 1
+        if budget[0] < 0:
+            raise
+        errors.append({'row': df.index[positions[0]], 'code': 'prediction_error', 'column': None,
+                       'value': None, 'message': f"{type(e).__name__}: {e}"})
+
+def _score_rows(df, model_name, explain=False):
+    with stage('validate', len(df)):
+        df, valid, errors = validate_rows(df, model_name)
+    pred = np.full(len(df), np.nan)
+    parts = np.full((len(df), len(explanation_columns(model_name))), np.nan) if explain else None
+    positions = np.flatnonzero(valid)
+    if len(positions):
+        _predict_isolated(df, positions, model_name, pred, errors, [MAX_ISOLATED_ERRORS], parts)
+    return pred, errors_frame(errors), parts
+
+def get_pred_safe(df, model_name, dedup=True, stats=None, memo=None, explain=False):
+    # Прогноз для всех годных строк; у остальных NaN и запись в отчете об ошибках.
+    # Одинаковые по колонкам модели строки считаются один раз (dedup), прогноз раздается всем копиям;
+    # memo (DedupMemo) переносит посчитанные строки между частями одного файла.
+    # stats (Counter) накапливает rows, unique_rows, dedup_s и score_s для dedup_report.
+    # explain=True - третьим элементом DataFrame вкладов полей (explanation_columns) с индексом df;
+    # memo тогда не используется: вклады в нем не хранятся
+    columns = MODEL_INPUT_COLUMNS[model_name]
+    if explain:
+        memo = None
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise ValueError(f"Отсутствуют обязательные колонки: {', '.join(missing)}")
+
+    start = time.perf_counter()
+    if not dedup or not len(df):
+        pred, errors, parts = _score_rows(df, model_name, explain)
+        unique, dedup_s = len(df), 0.0
+    else:
+        with stage('dedup', len(df)):
+            groups, first, hashes = row_groups(df, columns)
+            known, known_pred, known_errors = (memo.lookup(hashes) if memo is not None
+                                               else (np.zeros(len(hashes), dtype=bool), None, []))
+            new = np.flatnonzero(~known)
+        dedup_s = time.perf_counter() - start
+
+        # С копией только если есть что выбрасывать; reset_index без копирования данных
+        part = df if len(new) == len(df) else df.iloc[first[new]]
+        pred_new, errors_new, parts_new = _score_rows(part.reset_index(drop=True), model_name, explain)
+        if memo is not None:
+            memo.add(hashes[new], pred_new, errors_new)
+
+        pred = np.empty(len(hashes))
+        pred[new] = pred_new
+        if memo is not None:
+            pred[known] = known_pred
+        errors_new['row'] = new[errors_new['row'].to_numpy(dtype=np.intp)]
+        errors = pd.concat([errors_new, errors_frame(known_errors)], ignore_index=True) if known_errors else errors_new
+        pred, errors = pred[groups], expand_errors(errors, groups, df.index)
+        if explain:
+            # Без memo все группы новые, порядок групп совпадает с parts_new
+            parts = parts_new[groups]
+        unique = len(new)
+
+    if stats is not None:
+        stats.update({'rows': len(df), 'unique_rows': unique, 'dedup_s': dedup_s,
+                      'score_s': time.perf_counter() - start - dedup_s})
+    errors = errors.sort_values('row', kind='stable', ignore_index=True)
+    if explain:
+        return pred, errors, pd.DataFrame(parts, columns=explanation_columns(model_name), index=df.index)
+    return pred, errors
+
+# ---- Кэш прогнозов для одиночных записей ----
+PRED_CACHE = TTLCache(maxsize=1024, ttl=600.0)
+
+def _record_key(record, model_name):
+    # Только колонки, которые видит модель. Тип входит в ключ: 5 и 5.0 для seats дают разные категории.
+    # Название нормализуется так же, как в кэше разбора названий (strip)
+    key = []
+    for col in MODEL_INPUT_COLUMNS[model_name]:
+        value = record.get(col)
+        if isinstance(value, np.generic):
+            value = value.item()
+        if col == 'name' and isinstance(value, str):
+            value = value.strip()
+        key.append((type(value).__name__, value))
+    return tuple(key)
+
+def _cache_key(record, model_name):
+    return (model_name, registry.bundle_version(model_name), _record_key(record, model_name))
+
+def get_pred_cached(record, model_name):
+    # Прогноз для одной записи (dict); повтор той же записи не трогает pandas и модель
+    key = _cache_key(record, model_name)
+    pred = PRED_CACHE.get(key)
+    if pred is None:
+        pred = float(get_pred(pd.DataFrame([record]), model_name)[0])
+        PRED_CACHE.put(key, pred)
+    return pred
+
+def get_explanation_cached(record, model_name):
+    # Прогноз и вклады полей ({колонка explanation_columns: вклад}) для одной записи.
+    # Хранятся в PRED_CACHE рядом с ценой той же записи; прогноз заодно кладется и под ключ цены
+    key = _cache_key(record, model_name)
+    cached = PRED_CACHE.get(key + ('explain',))
+    if cached is None:
+        pred, parts = get_pred(pd.DataFrame([record]), model_name, explain=True)
+        cached = (float(pred[0]), dict(zip(explanation_columns(model_name), parts[0].tolist())))
+        PRED_CACHE.put(key + ('explain',), cached)
+        PRED_CACHE.put(key, cached[0])
+    return cached
@@ -0,0 +1,112 @@
+import time
+
+import pandas as pd
+
+from .Dedup import MEMO_MAX_ROWS, DedupMemo
+from .Formats import ChunkWriter, iter_chunks, read_head
+from .Memory import MEMORY_BUDGET_MB, WARMUP_ROWS, PeakMemory, plan_chunks
+from .Predict import MODEL_INPUT_COLUMNS, explanation_columns, get_pred_safe
+from .Validate import ROW_ERROR_COLUMNS
+
+STREAM_CHUNK_SIZE = 10000
+
+
+def count_csv_rows(source, block_size=1 << 20):
+    # Число строк данных (без заголовка) без разбора CSV; файл возвращается в начало
+    source.seek(0)
+    lines, last = 0, b'\n'
+    while True:
+        block = source.read(block_size)
+        if not block:
+            break
+        lines += block.count(b'\n')
+        last = block[-1:]
+    source.seek(0)
+    if last != b'\n':
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def chunk_plan(source, fmt, model_name, chunksize=None, budget_mb=None, parts=1, out_fmt=None):
+    # Явный chunksize или выключенный бюджет (0) - части фиксированного размера,
+    # иначе размер подбирается по замеру памяти на первых WARMUP_ROWS строках (если замер не удался -
+    # тоже фиксированный)
+    budget_mb = MEMORY_BUDGET_MB if budget_mb is None else budget_mb
+    if chunksize is None and budget_mb > 0:
+        columns = MODEL_INPUT_COLUMNS[model_name] if (out_fmt or fmt) != 'csv' else None
+        sample = read_head(source, fmt, WARMUP_ROWS, columns)
+        plan = plan_chunks(sample, model_name, budget_mb, parts) if len(sample) else None
+        if plan is not None:
+            return plan
+    return {'budget_mb': None, 'row_bytes': None, 'chunk_size': chunksize or STREAM_CHUNK_SIZE,
+            'memo_rows': MEMO_MAX_ROWS, 'over_budget': False}
+
+
+def explanations_frame(parts, pred):
+    # Отчет с объяснениями: номер строки (как в отчете об ошибках), прогноз и вклады полей
+    frame = parts.copy()
+    frame.insert(0, 'predicted_price', pred)
+    frame.insert(0, 'row', parts.index)
+    return frame
+
+
+def explanations_header(model_name):
+    return pd.DataFrame(columns=['row', 'predicted_price'] + explanation_columns(model_name))
+
+
+def score_stream(source, model_name, out_path, fmt='csv', chunksize=None, on_progress=None,
+                 errors_path=None, dedup=True, stats=None, budget_mb=None, memory=None, out_fmt=None,
+                 explain_path=None):
+    # Чтение, подготовка и прогноз по частям; результат дописывается в out_path в том же формате.
+    # Parquet и Arrow читаются только по колонкам модели.
+    # Строки с ошибками получают пустой прогноз и попадают в отчет errors_path.
+    # Повторы строк (в том числе из разных частей) считаются один раз, статистика копится в stats (Counter).
+    # Без chunksize размер части подбирается под бюджет памяти budget_mb; memory (dict) получает
+    # план (chunk_plan) и пиковый RSS процесса, обновляется после каждой части.
+    # out_fmt - формат результата, если он другой: CSV, сохраненный в UploadStore как Parquet,
+    # читается целиком и снова пишется в CSV.
+    # explain_path - CSV с вкладами полей в прогноз каждой строки (повторы тогда ищутся только внутри части)
+    start = time.perf_counter()
+    rows = n_errors = 0
+    out_fmt = out_fmt or fmt
+    columns = MODEL_INPUT_COLUMNS[model_name] if out_fmt != 'csv' else None
+    plan = chunk_plan(source, fmt, model_name, chunksize, budget_mb, out_fmt=out_fmt)
+    memory = {} if memory is None else memory
+    memory.update(plan)
+    memo = DedupMemo(plan['memo_rows']) if dedup else None
+    errors_out = open(errors_path, 'w', newline='', encoding='utf-8') if errors_path else None
+    explain_out = open(explain_path, 'w', newline='', encoding='utf-8') if explain_path else None
+    try:
+        if errors_out is not None:
+            pd.DataFrame(columns=ROW_ERROR_COLUMNS).to_csv(errors_out, index=False)
+        if explain_out is not None:
+            explanations_header(model_name).to_csv(explain_out, index=False)
+        with ChunkWriter(out_path, out_fmt) as out, PeakMemory() as peak:
+            for chunk, table in iter_chunks(source, fmt, plan['chunk_size'], columns):
+                if explain_out is None:
+                    pred, errors = get_pred_safe(chunk, model_name, dedup=dedup, stats=stats, memo=memo)
+                else:
+                    pred, errors, parts = get_pred_safe(chunk, model_name, dedup=dedup, stats=stats, explain=True)
+                    explanations_frame(parts, pred).to_csv(explain_out, index=False, header=False)
+                out.write(chunk if out_fmt == 'csv' else table, pred)
+                rows += len(chunk)
+                n_errors += errors['row'].nunique()
+                if errors_out is not None:
+                    errors.to_csv(errors_out, index=False, header=False)
+                memory.update(peak.report())
+                if on_progress is not None:
+                    on_progress(rows, time.perf_counter() - start, n_errors)
+            memory.update(peak.report())
+    finally:
+        if errors_out is not None:
+            errors_out.close()
+        if explain_out is not None:
+            explain_out.close()
+
+    return rows, time.perf_counter() - start, n_errors
+
+
+def score_csv_stream(source, model_name, out_path, chunksize=None, on_progress=None,
+                     errors_path=None, dedup=True, stats=None, budget_mb=None, memory=None, explain_path=None):
+    return score_stream(source, model_name, out_path, 'csv', chunksize, on_progress, errors_path, dedup, stats,
+                        budget_mb, memory, explain_path=explain_path)
@@ -0,0 +1,73 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from .Predict import MODEL_INPUT_COLUMNS, get_pred
+
+# Параметры, по которым можно построить зависимость цены: диапазон чисел (с единицей для текстовых
+# колонок, как их вводит пользователь) или список категорий
+SWEEP_PARAMS = {
+    'model2': {
+        'km_driven': {'label': "Пробег", 'kind': 'range', 'default': (0, 300000, 61), 'integer': True},
+        'year': {'label': "Год производства", 'kind': 'range', 'default': (1995, 2020, 26), 'integer': True},
+        'owner': {'label': "Владелец", 'kind': 'choice',
+                  'values': ['First Owner', 'Second Owner', 'Third Owner', 'Fourth & Above Owner', 'Test Drive Car']},
+        'fuel': {'label': "Топливо", 'kind': 'choice', 'values': ['Diesel', 'Petrol', 'CNG', 'LPG']},
+        'transmission': {'label': "Коробка передач", 'kind': 'choice', 'values': ['Manual', 'Automatic']},
+        'mileage': {'label': "Потребление, kmpl", 'kind': 'range', 'default': (10, 30, 41), 'unit': 'kmpl'},
+        'engine': {'label': "Объем, CC", 'kind': 'range', 'default': (800, 3000, 45), 'unit': 'CC', 'integer': True},
+        'max_power': {'label': "Мощность, bhp", 'kind': 'range', 'default': (40, 250, 43), 'unit': 'bhp'},
+        'seats': {'label': "Посадочные места", 'kind': 'range', 'default': (2, 10, 9), 'integer': True},
+    },
+}
+MAX_SWEEP_SCENARIOS = 40_000
+
+
+def sweep_values(model_name, param, start=None, stop=None, steps=None, values=None):
+    # Значения одной оси: равномерная сетка для диапазона, выбранные категории для списка
+    spec = SWEEP_PARAMS[model_name][param]
+    if spec['kind'] == 'choice':
+        return list(spec['values'] if values is None else values)
+    default = spec['default']
+    grid = np.linspace(default[0] if start is None else start, default[1] if stop is None else stop,
+                       default[2] if steps is None else steps)
+    if spec.get('integer'):
+        grid = np.unique(np.round(grid).astype(np.int64))
+    return grid.tolist()
+
+
+def _column(spec, values):
+    # Значения оси в том виде, в каком их ждет подготовка признаков ('74 bhp' для текстовых колонок)
+    if 'unit' in spec:
+        return np.array([f"{value:g} {spec['unit']}" for value in values], dtype=object)
+    return np.asarray(values, dtype=object if spec['kind'] == 'choice' else None)
+
+
+def build_grid(record, axes, model_name='model2'):
+    # Все сочетания значений осей (dict параметр -> значения, 1 или 2 оси) на основе одной записи.
+    # Первая ось меняется медленнее всего
+    params = SWEEP_PARAMS[model_name]
+    sizes = [len(values) for values in axes.values()]
+    n = int(np.prod(sizes))
+    if n == 0:
+        raise ValueError("Выберите хотя бы одно значение для каждого параметра")
+    if n > MAX_SWEEP_SCENARIOS:
+        raise ValueError(f"Слишком много сценариев: {n} (не больше {MAX_SWEEP_SCENARIOS})")
+
+    grid = pd.DataFrame({col: [record.get(col)] * n for col in MODEL_INPUT_COLUMNS[model_name]})
+    repeat = n
+    for param, values in axes.items():
+        repeat //= len(values)
+        column = _column(params[param], values)
+        grid[param] = np.tile(np.repeat(column, repeat), n // (repeat * len(values)))
+    return grid
+
+
+def run_sweep(record, axes, model_name='model2'):
+    # Сетка сценариев и прогноз одним вызовом модели; результат - значения осей и predicted_price
+    grid = build_grid(record, axes, model_name)
+    pred = get_pred(grid, model_name)
+    result = pd.DataFrame(list(itertools.product(*axes.values())), columns=list(axes))
+    result['predicted_price'] = pred
+    return result
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+from .Formats import count_rows, detect_format, output_name, read_schema
+
+logger = logging.getLogger(__name__)
+
+# Загруженные файлы хранятся на диске, а не в памяти сессии: <UPLOADS_DIR>/<sha256>.<ext> и <sha256>.json.
+# Ключ - хэш содержимого, поэтому один и тот же файл от разных пользователей лежит один раз.
+# CSV сохраняется как Parquet со строковыми колонками (текст значений не меняется, пустые - null),
+# Parquet и Arrow IPC - как есть. В сессии остается только ключ.
+#   APP_UPLOADS_DIR    - каталог
+#   APP_UPLOADS_MAX_MB - общий размер, сверх которого удаляются давно не открывавшиеся файлы
+#   APP_UPLOADS_TTL    - через сколько секунд без обращений файл удаляется
+UPLOADS_DIR = os.environ.get('APP_UPLOADS_DIR', os.path.join(tempfile.gettempdir(), 'linearauto_uploads'))
+UPLOADS_MAX_MB = int(os.environ.get('APP_UPLOADS_MAX_MB', '2048'))
+UPLOADS_TTL = int(os.environ.get('APP_UPLOADS_TTL', str(6 * 3600)))
+_KEY_RE = re.compile(r'[0-9a-f]{64}')
+
+
+def content_hash(source, block_size=1 << 20):
+    digest = hashlib.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+    elif hasattr(source, 'getbuffer'):
+        digest.update(source.getbuffer())
+    else:
+        source.seek(0)
+        for block in iter(lambda: source.read(block_size), b''):
+            digest.update(block)
+        source.seek(0)
+    return digest.hexdigest()
+
+
+def _csv_to_parquet(source, path):
+    # Потоковое преобразование блоками: все колонки - строки, как их записал пользователь;
+    # типы определяет подготовка признаков, как и при чтении CSV через pandas
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+    import pyarrow.parquet as pq
+
+    columns = read_schema(source, 'csv')
+    source.seek(0)
+    reader = pcsv.open_csv(
+        source,
+        parse_options=pcsv.ParseOptions(newlines_in_values=True),
+        convert_options=pcsv.ConvertOptions(column_types={col: pa.string() for col in columns},
+                                            strings_can_be_null=True),
+    )
+    with pq.ParquetWriter(path, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+    source.seek(0)
+
+
+class UploadStore:
+    def __init__(self, root=UPLOADS_DIR, max_mb=UPLOADS_MAX_MB, ttl=UPLOADS_TTL):
+        self.root = root
+        self.max_bytes = max_mb * 2**20
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def _meta_path(self, key):
+        return os.path.join(self.root, key + '.json')
+
+    def _save_meta(self, meta):
+        path = self._meta_path(meta['key'])
+        tmp = path + f'.{threading.get_ident()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)
+
+    def put(self, source, name):
+        # source - путь или файловый объект (UploadedFile). Возвращает ключ; повторная загрузка
+        # того же содержимого только обновляет время обращения
+        fmt = detect_format(name)
+        key = content_hash(source)
+        meta = self.get(key)
+        if meta is not None:
+            return key
+
+        os.makedirs(self.root, exist_ok=True)
+        stored = 'parquet' if fmt == 'csv' else fmt
+        path = os.path.join(self.root, output_name(stored, key))
+        tmp = path + f'.{threading.get_ident()}.tmp'
+        try:
+            if fmt == 'csv':
+                if isinstance(source, (str, os.PathLike)):
+                    with open(source, 'rb') as f:
+                        _csv_to_parquet(f, tmp)
+                else:
+                    _csv_to_parquet(source, tmp)
+            elif isinstance(source, (str, os.PathLike)):
+                shutil.copyfile(source, tmp)
+            else:
+                source.seek(0)
+                with open(tmp, 'wb') as f:
+                    shutil.copyfileobj(source, f)
+                source.seek(0)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        now = time.time()
+        meta = {
+            'key': key,
+            'name': os.path.basename(str(name)),
+            'format': fmt,
+            'stored_format': stored,
+            'path': path,
+            'rows': count_rows(path, stored),
+            'columns': read_schema(path, stored),
+            'size': os.path.getsize(path),
+            'created': now,
+            'accessed': now,
+        }
+        self._save_meta(meta)
+        logger.info("upload %s stored: %s, %d rows, %.1f MB", key, meta['name'], meta['rows'], meta['size'] / 2**20)
+        self.evict(keep=key)
+        return key
+
+    def get(self, key):
+        # Метаданные файла (путь, формат, строки, колонки) с обновлением времени обращения; None - удален
+        if not isinstance(key, str) or not _KEY_RE.fullmatch(key):
+            return None
+        try:
+            with open(self._meta_path(key)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(meta['path']):
+            self._remove(meta)
+            return None
+        meta['accessed'] = time.time()
+        self._save_meta(meta)
+        return meta
+
+    def _entries(self):
+        entries = []
+        for file_name in os.listdir(self.root):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.root, file_name)) as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+    def _remove(self, meta):
+        for path in (meta['path'], self._meta_path(meta['key'])):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def evict(self, keep=None):
+        # Сначала файлы без обращений дольше ttl, затем самые давние, пока общий размер больше max_bytes.
+        # Задачи держат свою жесткую ссылку на файл, поэтому удаление их не затрагивает
+        if not os.path.isdir(self.root):
+            return 0
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda meta: meta['accessed'])
+            deadline = time.time() - self.ttl
+            total = sum(meta['size'] for meta in entries)
+            removed = 0
+            for meta in entries:
+                if meta['key'] == keep:
+                    continue
+                if meta['accessed'] >= deadline and total <= self.max_bytes:
+                    break
+                self._remove(meta)
+                total -= meta['size']
+                removed += 1
+        if removed:
+            logger.info("uploads: %d evicted, %.1f MB kept", removed, total / 2**20)
+        return removed
+
+    def stats(self):
+        entries = self._entries() if os.path.isdir(self.root) else []
+        return {'files': len(entries), 'size_mb': sum(meta['size'] for meta in entries) / 2**20}
+
+
+UPLOADS = UploadStore()
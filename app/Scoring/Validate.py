@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from DataPreparation.utils import torque_parse_failures
+
+# Отчет об ошибках: row - метка строки во входных данных (для CSV - номер строки данных с 0)
+ROW_ERROR_COLUMNS = ['row', 'code', 'column', 'value', 'message']
+
+# Сколько строк может изолировать повторный прогноз по частям, прежде чем ошибка
+# считается общей для всех данных (нет файла модели и т.п.)
+MAX_ISOLATED_ERRORS = 100
+
+_NUMERIC_COLUMNS = {'model1': [], 'model2': ['year', 'km_driven']}
+
+
+def _report(errors, df, mask, code, column, message):
+    for row, value in zip(df.index[mask], df[column].to_numpy()[mask]):
+        errors.append({'row': row, 'code': code, 'column': column, 'value': str(value), 'message': message})
+
+
+def validate_rows(df, model_name):
+    # Проверка значений, на которых падает подготовка признаков. Возвращает копию df
+    # с приведенными колонками, маску годных строк и список ошибок
+    df = df.copy()
+    valid = np.ones(len(df), dtype=bool)
+    errors = []
+
+    # seats приводится к int: 5.0 из CSV с пропусками - то же, что 5
+    seats = pd.to_numeric(df['seats'], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    integral = np.isfinite(seats) & (seats == np.round(seats))
+    if model_name == 'model1':
+        _report(errors, df, ~integral, 'invalid_seats', 'seats', "Число мест должно быть целым числом")
+        valid &= integral
+        df['seats'] = np.where(integral, seats, 0).astype(np.int64)
+    else:
+        # Для модели 2 seats - категория: прочие значения просто не совпадут ни с одной
+        values = df['seats'].to_numpy(dtype=object, copy=True)
+        values[integral] = seats[integral].astype(np.int64)
+        df['seats'] = values
+
+    for col in _NUMERIC_COLUMNS[model_name]:
+        values = pd.to_numeric(df[col], errors='coerce')
+        bad = (values.isna() & df[col].notna()).to_numpy()
+        _report(errors, df, bad, 'invalid_number', col, "Значение должно быть числом")
+        valid &= ~bad
+        df[col] = values
+
+    if model_name == 'model2':
+        bad = torque_parse_failures(df['torque'])
+        _report(errors, df, bad, 'invalid_torque', 'torque', "Не удалось разобрать крутящий момент")
+        valid &= ~bad
+
+    return df, valid, errors
+
+
+def errors_frame(errors):
+    return pd.DataFrame(errors, columns=ROW_ERROR_COLUMNS)
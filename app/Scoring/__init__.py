@@ -0,0 +1,13 @@
+from .Predict import (MODEL_INPUT_COLUMNS, PRED_CACHE, explanation_columns, get_explanation_cached, get_pred,
+                      get_pred_cached, get_pred_safe)
+from .Explain import BASE_COLUMN, FIELD_LABELS
+from .Validate import ROW_ERROR_COLUMNS
+from .Dedup import dedup_report
+from .Stream import STREAM_CHUNK_SIZE, chunk_plan, count_csv_rows, score_csv_stream, score_stream
+from .Memory import MEMORY_BUDGET_MB, PeakMemory, plan_chunks
+from .Formats import FORMATS, UPLOAD_TYPES, detect_format, output_name, read_head, read_schema, count_rows
+from .Batch import score_csv_parallel, format_summary
+from .MicroBatch import MicroBatcher
+from .Jobs import JOBS, JobManager, ACTIVE_STATUSES
+from .Uploads import UPLOADS, UploadStore
+from .Sweep import SWEEP_PARAMS, MAX_SWEEP_SCENARIOS, build_grid, run_sweep, sweep_values
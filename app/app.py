@@ -1,12 +1,13 @@
 import streamlit as st
-import numpy as np
-import pandas as pd
-import pickle
-from DataPreparation import preparation_for_model_1, preparation_for_model_2
-from AppUtils import *
+from AppUtils import (metrics_card, get_diff, session_model_1, session_model_2, session_viz_1, session_viz_2,
+                      lazy_expander, paiplot_block, heatmap_block, phik_block, boxplot_block, scatter_block,
+                      distribution_block, profiling_session, profiling_sidebar, restore_csv_job)
 
+profiling_session()
 st.title("Сервис придумывания стоимости Вашего коня")
-tab1, tab2, tab3 = st.tabs(["Получить прогноз", "Визуализация обучающих данных", "Визуализация весов модели"])  # Вкладки
+restore_csv_job()
+tab1, tab2, tab3 = st.tabs(["Получить прогноз", "Визуализация обучающих данных", "Визуализация весов модели"],
+                           key="tabs", on_change="rerun")  # Вкладки; графики рисуются только в открытой
 metric1 = [0.93, 0.39, 0.16]
 metric2 = [0.95, 0.44, 0.23]
 
@@ -48,47 +49,40 @@ with tab1:
             st.rerun()
 
 with tab2:
-    with st.expander("📈 Pairplot для обучающей выборки", expanded=False):
-        paiplot_block()
-
-    with st.expander("📈 Корреляционная карта для обучающей выборки", expanded=False):
-        heatmap_block()
-
-    with st.expander("📈 Корреляционная карта Phik для обучающей выборки", expanded=False):
-        phik_block()
-
-    with st.expander("📈 Проверка выбросов", expanded=False):
-        boxplot_block()
-
-    with st.expander("📈 Диаграмма рассеяния для цены и количества владельцев", expanded=False):
-        scatter_block()
-    
-    with st.expander("📈 Графики распределения для числовых признаков", expanded=False):
-        distribution_block()
+    if tab2.open:
+        lazy_expander("📈 Pairplot для обучающей выборки", "exp_pairplot", paiplot_block)
+        lazy_expander("📈 Корреляционная карта для обучающей выборки", "exp_heatmap", heatmap_block)
+        lazy_expander("📈 Корреляционная карта Phik для обучающей выборки", "exp_phik", phik_block)
+        lazy_expander("📈 Проверка выбросов", "exp_boxplot", boxplot_block)
+        lazy_expander("📈 Диаграмма рассеяния для цены и количества владельцев", "exp_scatter", scatter_block)
+        lazy_expander("📈 Графики распределения для числовых признаков", "exp_distribution", distribution_block)
 
 with tab3:
-    if "model_w" not in st.session_state:
-        st.header("Выберите модель прогноза")
-        col1, col2 = st.columns(2)
-        with col1:
-            select1 = st.button("Выбрать модель 1", key="weights1", use_container_width=True)
-            if select1:
-                st.session_state['model_w'] = "model_1"
+    if tab3.open:
+        if "model_w" not in st.session_state:
+            st.header("Выберите модель прогноза")
+            col1, col2 = st.columns(2)
+            with col1:
+                select1 = st.button("Выбрать модель 1", key="weights1", use_container_width=True)
+                if select1:
+                    st.session_state['model_w'] = "model_1"
+                    st.rerun()
+            with col2:
+                select2 = st.button("Выбрать модель 2", key="weights2", use_container_width=True)
+                if select2:
+                    st.session_state['model_w'] = "model_2"
+                    st.rerun()
+
+        elif st.session_state['model_w'] == 'model_1':
+            if st.button("← Выбрать другую модель", key="back_from_weights1"):
+                del st.session_state["model_w"]
                 st.rerun()
-        with col2:
-            select2 = st.button("Выбрать модель 2", key="weights2", use_container_width=True)
-            if select2:
-                st.session_state['model_w'] = "model_2"
+            session_viz_1()
+    
+        elif st.session_state['model_w']=='model_2':
+            if st.button("← Выбрать другую модель", key="back_from_weights2"):
+                del st.session_state["model_w"]
                 st.rerun()
+            session_viz_2()
 
-    elif st.session_state['model_w'] == 'model_1':
-        if st.button("← Выбрать другую модель", key="back_from_weights1"):
-            del st.session_state["model_w"]
-            st.rerun()
-        session_viz_1()
-    
-    elif st.session_state['model_w']=='model_2':
-        if st.button("← Выбрать другую модель", key="back_from_weights2"):
-            del st.session_state["model_w"]
-            st.rerun()
-        session_viz_2()
\ No newline at end of file
+profiling_sidebar()
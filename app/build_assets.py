@@ -0,0 +1,87 @@
+# Подготовка статических ресурсов приложения (запускать из корня репозитория):
+#   python -m app.build_assets                  # все шаги
+#   python -m app.build_assets --only bundles
+# Графики весов из pickle переводятся в компактный JSON plotly, который читается без unpickle;
+# артефакты каждой модели упаковываются в один версионированный файл app/models/<model>/<model>_bundle.pickle
+# и экспортируются в app/models/<model>/mmap/ (массивы в memmap-файле, общем для всех процессов).
+import argparse
+import glob
+import os
+import pickle
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ModelStore import MODEL_BUNDLES, PACKED_BUNDLES, MAPPED_BUNDLES, pack_bundle, export_mapped_bundle
+
+GRAPHS_DIR = 'app/graphs'
+
+
+class _FigureUnpickler(pickle.Unpickler):
+    # Фигура plotly сериализуется как Figure(dict); вместо классов plotly подставляем заглушку
+    # и забираем исходный dict - без импорта plotly и без проверки свойств текущей версией
+    def find_class(self, module, name):
+        if module.startswith('plotly'):
+            return type(name, (_PlotlyStub,), {})
+        return super().find_class(module, name)
+
+
+class _PlotlyStub:
+    def __init__(self, *args, **kwargs):
+        self.args = args
+
+    def __setstate__(self, state):
+        pass
+
+
+def figure_to_json(pickle_path, json_path):
+    import plotly.graph_objects as go
+
+    with open(pickle_path, 'rb') as f:
+        props = _FigureUnpickler(f).load().args[0]
+
+    # Свойства, которых нет в установленной версии plotly (например, mapbox в шаблоне), отбрасываются;
+    # to_json пишет числовые массивы в компактном бинарном виде
+    fig = go.Figure({'data': props['data'], 'layout': props['layout']}, skip_invalid=True)
+    with open(json_path, 'w') as f:
+        f.write(fig.to_json())
+    return os.path.getsize(pickle_path), os.path.getsize(json_path)
+
+
+def build_figures(graphs_dir=GRAPHS_DIR):
+    for pickle_path in sorted(glob.glob(os.path.join(graphs_dir, '*.pickle'))):
+        json_path = os.path.splitext(pickle_path)[0] + '.json'
+        before, after = figure_to_json(pickle_path, json_path)
+        print(f"{pickle_path} -> {json_path}: {before} -> {after} bytes")
+
+
+def build_bundles():
+    for model_name in MODEL_BUNDLES:
+        version = pack_bundle(model_name)
+        path = PACKED_BUNDLES[model_name]
+        print(f"{model_name} -> {path}: version {version}, {os.path.getsize(path)} bytes")
+
+
+def build_mapped():
+    for model_name in MODEL_BUNDLES:
+        version = export_mapped_bundle(model_name)
+        path = MAPPED_BUNDLES[model_name]
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        print(f"{model_name} -> {path}: version {version}, {size} bytes")
+
+
+STEPS = {'figures': build_figures, 'bundles': build_bundles, 'mapped': build_mapped}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build static app assets")
+    parser.add_argument('--only', choices=list(STEPS), help="run a single step")
+    args = parser.parse_args(argv)
+
+    for name, step in STEPS.items():
+        if args.only is None or args.only == name:
+            step()
+
+
+if __name__ == '__main__':
+    main()
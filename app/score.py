@@ -0,0 +1,42 @@
+# Пакетный прогноз без Streamlit:
+#   python -m app.score --model model2 in.csv out.csv --workers 8 --memory-budget-mb 2048
+# Запускать из корня репозитория (пути к моделям относительные, как и в StartApp.sh)
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ModelStore import MODEL_BUNDLES
+from Scoring import MEMORY_BUDGET_MB, STREAM_CHUNK_SIZE, format_summary, score_csv_parallel
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch price prediction for a CSV, Parquet or Arrow IPC file")
+    parser.add_argument('--model', choices=sorted(MODEL_BUNDLES), required=True)
+    parser.add_argument('input', help="input CSV, Parquet or Arrow IPC file")
+    parser.add_argument('output', help="output file in the input format: input columns + predicted_price "
+                                       "(for Parquet/Arrow only the model columns are read)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="number of worker processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int,
+                        help="rows per chunk sent to a worker (default: sized to --memory-budget-mb)")
+    parser.add_argument('--memory-budget-mb', type=int, default=MEMORY_BUDGET_MB,
+                        help="memory for chunks in flight across all workers; chunk size is derived from "
+                             "per-row cost measured on the first rows (0: fixed %d-row chunks)" % STREAM_CHUNK_SIZE)
+    parser.add_argument('--errors', help="CSV report of rows that could not be scored")
+    parser.add_argument('--explain', help="CSV with per-row price contributions of each input field "
+                                          "(base + contributions = predicted_price)")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="score identical rows of a chunk separately instead of once")
+    args = parser.parse_args(argv)
+
+    stats = score_csv_parallel(args.input, args.output, args.model,
+                               workers=args.workers, chunksize=args.chunk_size,
+                               errors_path=args.errors, dedup=not args.no_dedup,
+                               budget_mb=args.memory_budget_mb, explain_path=args.explain)
+    print(format_summary(stats), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
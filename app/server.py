@@ -0,0 +1,112 @@
+# HTTP-сервис прогноза:
+#   python -m app.server --port 8000 --max-batch-size 256 --max-wait-ms 5
+#   POST /predict/model1, /predict/model2 - одна запись (объект) или список записей
+#   GET  /stats - задержки p50/p99 и распределение размеров батчей
+# Запускать из корня репозитория (пути к моделям относительные, как и в StartApp.sh)
+import argparse
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ModelStore import MODEL_BUNDLES, registry
+from Scoring import MicroBatcher, MODEL_INPUT_COLUMNS
+
+
+class PredictServer(ThreadingHTTPServer):
+    # Очередь соединений по умолчанию (5) слишком мала для пачки одновременных запросов
+    request_queue_size = 1024
+
+
+def make_handler(batchers):
+    class PredictHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/stats':
+                self._send(200, {name: b.stats() for name, b in batchers.items()})
+            elif self.path == '/health':
+                self._send(200, {'status': 'ok'})
+            else:
+                self._send(404, {'error': f"unknown path {self.path}"})
+
+        def do_POST(self):
+            model_name = self.path.removeprefix('/predict/')
+            if not self.path.startswith('/predict/') or model_name not in batchers:
+                self._send(404, {'error': f"unknown path {self.path}"})
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'null')
+            except (ValueError, UnicodeDecodeError) as e:
+                self._send(400, {'error': f"invalid JSON: {e}"})
+                return
+
+            single = isinstance(payload, dict)
+            records = [payload] if single else payload
+            if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+                self._send(400, {'error': "expected a JSON object or a list of objects"})
+                return
+            if not records:
+                self._send(200, {'predictions': []})
+                return
+
+            missing = sorted({col for r in records for col in MODEL_INPUT_COLUMNS[model_name] if col not in r})
+            if missing:
+                self._send(400, {'error': f"missing fields: {', '.join(missing)}"})
+                return
+            # Значения полей - только числа, строки или null: список или объект ломает весь батч
+            nested = sorted({col for r in records for col, value in r.items() if isinstance(value, (dict, list))})
+            if nested:
+                self._send(400, {'error': f"non-scalar values in fields: {', '.join(nested)}"})
+                return
+
+            try:
+                pred = batchers[model_name].predict(records)
+            except Exception as e:
+                self._send(422, {'error': str(e)})
+                return
+            self._send(200, {'prediction': pred[0]} if single else {'predictions': pred})
+
+        def log_message(self, format, *args):
+            pass
+
+    return PredictHandler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSON prediction service with micro-batching")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=256,
+                        help="max rows coalesced into one predict call")
+    parser.add_argument('--max-wait-ms', type=float, default=5.0,
+                        help="how long the first request of a batch waits for others")
+    args = parser.parse_args(argv)
+
+    batchers = {}
+    for model_name in MODEL_BUNDLES:
+        registry.get_bundle(model_name)
+        batchers[model_name] = MicroBatcher(model_name, args.max_batch_size, args.max_wait_ms)
+
+    server = PredictServer((args.host, args.port), make_handler(batchers))
+    print(f"serving on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
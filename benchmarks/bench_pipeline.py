@@ -0,0 +1,224 @@
+# Бенчмарк подготовки признаков и прогноза:
+#   python benchmarks/bench_pipeline.py --sizes 1 100 10000 1000000 --output bench.json
+#   python benchmarks/bench_pipeline.py --save-baseline      # обновить benchmarks/baseline.json
+# Результаты - JSON (время, строк/с, мкс на строку, пиковая память) и сравнение с baseline.
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+os.chdir(ROOT)
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from DataPreparation import preparation_for_model_1, preparation_for_model_1_sparse, preparation_for_model_2
+from DataPreparation import utils, Parallel
+from ModelStore import MODEL_BUNDLES, registry
+from Scoring import get_pred
+
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+DEFAULT_SIZES = [1, 100, 10000, 1000000]
+SHARDS = os.cpu_count() or 1
+
+# ---- Синтетические данные ----
+BRANDS = {
+    'Maruti': ['Swift', 'Swift Dzire', 'Alto 800', 'Wagon R', 'Ertiga', 'Baleno', 'Ciaz'],
+    'Hyundai': ['i20', 'i10', 'Grand i10', 'Creta', 'Verna', 'Santro'],
+    'Honda': ['City', 'Amaze', 'Jazz', 'WR-V'],
+    'Toyota': ['Innova', 'Innova Crysta', 'Fortuner', 'Etios', 'Corolla Altis'],
+    'Mahindra': ['XUV500', 'Scorpio', 'Bolero', 'KUV 100', 'Thar'],
+    'Tata': ['Nexon', 'Tiago', 'Indica', 'Safari', 'Zest'],
+    'Ford': ['EcoSport', 'Figo', 'Endeavour', 'Aspire'],
+    'Volkswagen': ['Polo', 'Vento', 'Ameo'],
+    'BMW': ['X1', 'X3', '3 Series', '5 Series'],
+    'Audi': ['A4', 'A6', 'Q3', 'Q7'],
+}
+TORQUE_VALUES = ['190Nm@ 2000rpm', '250Nm@ 1500-2500rpm', '12.7@ 2,700(kgm@ rpm)', '22.4 kgm at 1750-2750rpm',
+                 '11.5@ 4,500(kgm@ rpm)', '113.75nm@ 4000rpm', '24@ 1,900-2,750(kgm@ rpm)', '400Nm',
+                 '51nm@ 4000+/-500rpm', '48@ 3,000+/-500(nm@ rpm)', '210 / 1900', '380Nm(38.7kgm)@ 2500rpm',
+                 '135 Nm at 2500 rpm ', '6.1kgm@ 3000rpm', '200Nm@ 1750~2750rpm', np.nan]
+OWNERS = ['First Owner', 'Second Owner', 'Third Owner', 'Fourth & Above Owner', 'Test Drive Car']
+
+
+def make_names(n_unique, rng):
+    trims = utils.TRIM_KEYWORDS + ['Option', 'Plus', 'Sportz', 'Dual Tone', 'Signature', 'Anniversary']
+    extra = (list(utils.FUEL_KEYWORDS) + list(utils.TRANSMISSION_KEYWORDS) + list(utils.BODY_KEYWORDS)
+             + ['BSIV', 'BS III', 'BS6', '4X4', '2WD', 'CRDi', 'VTVT', 'AT', 'MT', '1.2', '1.5', '2.0', '1197cc'])
+    brands = list(BRANDS)
+    names = []
+    for _ in range(n_unique):
+        brand = brands[rng.integers(len(brands))]
+        parts = [brand, BRANDS[brand][rng.integers(len(BRANDS[brand]))]]
+        parts += [trims[i] for i in rng.integers(len(trims), size=rng.integers(0, 2))]
+        parts += [extra[i].upper() if len(extra[i]) <= 3 else extra[i].title()
+                  for i in rng.integers(len(extra), size=rng.integers(0, 3))]
+        names.append(' '.join(parts))
+    return np.array(names, dtype=object)
+
+
+def make_records(n, seed=0):
+    # Названия повторяются, как в реальных выгрузках: ~1 уникальное на 50 строк
+    rng = np.random.default_rng(seed)
+    names = make_names(max(1, min(n // 50, 20000)), rng)
+    return pd.DataFrame({
+        'name': names[rng.integers(len(names), size=n)],
+        'year': rng.integers(1995, 2021, n),
+        'km_driven': rng.integers(1000, 300000, n),
+        'age': rng.integers(1, 25, n),
+        'fuel': rng.choice(['Diesel', 'Petrol', 'CNG', 'LPG'], n),
+        'seller_type': rng.choice(['Individual', 'Dealer', 'Trustmark Dealer'], n),
+        'transmission': rng.choice(['Manual', 'Automatic'], n),
+        'owner': rng.choice(OWNERS, n),
+        'mileage': rng.choice(np.array(['23.4 kmpl', '18.9 kmpl', '26.6 km/kg', '17 kmpl', np.nan], dtype=object), n),
+        'engine': rng.choice(np.array(['1248 CC', '1197 CC', '1498 CC', '2179 CC', np.nan], dtype=object), n),
+        'max_power': rng.choice(np.array(['74 bhp', '88.5 bhp', '103.52 bhp', '140 bhp', np.nan], dtype=object), n),
+        'torque': rng.choice(np.array(TORQUE_VALUES, dtype=object), n),
+        'seats': rng.choice([5, 5, 5, 7, 8, 4], n),
+    })
+
+
+# ---- Замеряемые функции ----
+M1, M2 = MODEL_BUNDLES['model1'], MODEL_BUNDLES['model2']
+CASES = [
+    # (имя, функция, максимальный размер или None)
+    ('parse_name_series', lambda df: utils.parse_name_series(df['name']), None),
+    ('astype_numeric', lambda df: utils.astype_numeric(df, ['mileage', 'engine', 'max_power'], float), None),
+    ('apply_split_torque', utils.apply_split_torque, None),
+    # Плотная матрица на 1M строк заняла бы ~13 ГБ
+    ('preparation_for_model_1', lambda df: preparation_for_model_1(df, M1['features'], M1['ohe'], M1['ohe_features']), 10000),
+    ('preparation_for_model_1_sparse',
+     lambda df: preparation_for_model_1_sparse(df, M1['features'], M1['ohe'], M1['ohe_features']), None),
+    ('preparation_for_model_2', lambda df: preparation_for_model_2(df, M2['features'], M2['IQRbounds'], M2['meanNum']), None),
+    # Пул процессов создается при первом запуске и дальше остается прогретым (артефакты, кэш названий)
+    ('preparation_for_model_1_sparse[sharded]',
+     lambda df: preparation_for_model_1_sparse(df, M1['features'], M1['ohe'], M1['ohe_features'],
+                                               shards=SHARDS, min_rows=0), None),
+    ('preparation_for_model_2[sharded]',
+     lambda df: preparation_for_model_2(df, M2['features'], M2['IQRbounds'], M2['meanNum'],
+                                        shards=SHARDS, min_rows=0), None),
+    ('get_pred[model1]', lambda df: get_pred(df, 'model1'), None),
+    ('get_pred[model2]', lambda df: get_pred(df, 'model2'), None),
+]
+
+
+def measure(fn, df, repeat):
+    # Время - лучшее из repeat запусков, память - отдельный запуск под tracemalloc.
+    # Кэш названий очищается перед каждым запуском, артефакты уже загружены.
+    times = []
+    for _ in range(repeat):
+        utils.NAME_CACHE.clear()
+        start = time.perf_counter()
+        fn(df)
+        times.append(time.perf_counter() - start)
+
+    utils.NAME_CACHE.clear()
+    tracemalloc.start()
+    fn(df)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), peak
+
+
+def run(sizes, repeat, cases=None):
+    for name in MODEL_BUNDLES:
+        registry.get_bundle(name)
+
+    results = []
+    for n in sizes:
+        df = make_records(n)
+        for name, fn, max_rows in CASES:
+            if cases and name not in cases:
+                continue
+            if max_rows is not None and n > max_rows:
+                continue
+            seconds, peak = measure(fn, df, repeat if n <= 10000 else 1)
+            results.append({
+                'name': name,
+                'rows': n,
+                'seconds': seconds,
+                'rows_per_s': n / seconds if seconds > 0 else None,
+                'us_per_row': seconds / n * 1e6,
+                'peak_mb': peak / 2**20,
+            })
+            print(f"{name:32s} {n:>9d} rows  {seconds:9.4f} s  {n / seconds:12,.0f} rows/s  "
+                  f"{peak / 2**20:9.1f} MB", file=sys.stderr)
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'shards': SHARDS,
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    # Регрессия - время хуже baseline больше чем на tolerance
+    base = {(r['name'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    for r in report['results']:
+        b = base.get((r['name'], r['rows']))
+        if b is None:
+            r['baseline_ratio'] = None
+            continue
+        r['baseline_ratio'] = r['seconds'] / b['seconds'] if b['seconds'] > 0 else None
+        if r['baseline_ratio'] is not None and r['baseline_ratio'] > 1 + tolerance:
+            regressions.append(r)
+        print(f"{r['name']:32s} {r['rows']:>9d} rows  x{r['baseline_ratio']:.2f} vs baseline"
+              + ("  REGRESSION" if r in regressions else ""), file=sys.stderr)
+    report['regressions'] = [{'name': r['name'], 'rows': r['rows'], 'ratio': r['baseline_ratio']}
+                             for r in regressions]
+    return regressions
+
+
+def main(argv=None):
+    global SHARDS
+    parser = argparse.ArgumentParser(description="Benchmark feature preparation and prediction")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=3, help="timing repeats for sizes up to 10k rows")
+    parser.add_argument('--cases', nargs='+', help="run only these cases")
+    parser.add_argument('--output', help="write the JSON report here (default: stdout)")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown vs baseline")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the new baseline")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--shards', type=int, default=SHARDS, help="processes for the [sharded] cases")
+    args = parser.parse_args(argv)
+    SHARDS = args.shards
+
+    report = run(args.sizes, args.repeat, args.cases)
+
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            f.write(text + '\n')
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    elif not args.save_baseline:
+        print(text)
+
+    Parallel.shutdown()
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
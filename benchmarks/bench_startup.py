@@ -0,0 +1,95 @@
+# Время холодного старта по фазам (каждый замер - в новом процессе):
+#   python benchmarks/bench_startup.py --repeat 3
+#   python benchmarks/bench_startup.py --output startup.json
+# Сравниваются загрузка из memmap-экспорта, из упакованных бандлов (APP_MAPPED_BUNDLES=0)
+# и из отдельных pickle-файлов (APP_MAPPED_BUNDLES=0 APP_PACKED_BUNDLES=0).
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RECORD = {'name': 'Maruti Swift Dzire VDI', 'year': 2014, 'km_driven': 145500, 'fuel': 'Diesel',
+          'transmission': 'Manual', 'owner': 'First Owner', 'mileage': '23.4 kmpl', 'engine': '1248 CC',
+          'max_power': '74 bhp', 'torque': '190Nm@ 2000rpm', 'seats': 5}
+
+# (фаза, вид, код); фазы выполняются по порядку в одном процессе
+PHASES = [
+    ('streamlit', 'import', "import streamlit"),
+    ('app modules', 'import', "import AppUtils"),
+    ('prediction stack', 'import', "import Scoring"),
+    ('scikit-learn', 'import', "import sklearn.compose, sklearn.linear_model, sklearn.pipeline, sklearn.preprocessing"),
+    ('model1 artifacts', 'artifacts', "from ModelStore import registry; registry.get_bundle('model1')"),
+    ('model2 artifacts', 'artifacts', "from ModelStore import registry; registry.get_bundle('model2')"),
+    ('first prediction', 'predict', "import pandas as pd; from Scoring import get_pred; "
+                                    "[get_pred(pd.DataFrame([RECORD]), m) for m in ('model1', 'model2')]"),
+]
+
+
+def run_phases():
+    sys.path.insert(0, os.path.join(ROOT, 'app'))
+    os.chdir(ROOT)
+    namespace = {'RECORD': RECORD}
+    results = []
+    for name, kind, code in PHASES:
+        modules = len(sys.modules)
+        start = time.perf_counter()
+        exec(code, namespace)
+        results.append({'phase': name, 'kind': kind, 'seconds': time.perf_counter() - start,
+                        'new_modules': len(sys.modules) - modules})
+    return results
+
+
+MODES = {
+    'mapped': {'APP_MAPPED_BUNDLES': '1', 'APP_PACKED_BUNDLES': '1'},
+    'packed': {'APP_MAPPED_BUNDLES': '0', 'APP_PACKED_BUNDLES': '1'},
+    'files': {'APP_MAPPED_BUNDLES': '0', 'APP_PACKED_BUNDLES': '0'},
+}
+
+
+def measure(mode, repeat):
+    # Лучшее время каждой фазы из repeat холодных запусков
+    env = dict(os.environ, PYTHONWARNINGS='ignore', **MODES[mode])
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'],
+                             env=env, check=True, capture_output=True, text=True).stdout
+        results = json.loads(out)
+        if best is None:
+            best = results
+        else:
+            for b, r in zip(best, results):
+                b['seconds'] = min(b['seconds'], r['seconds'])
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start time by phase")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="write the JSON report here")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_phases()))
+        return
+
+    report = {mode: measure(mode, args.repeat) for mode in MODES}
+    print(f"{'phase':20s} {'kind':10s}" + ''.join(f"{mode + ', ms':>12s}" for mode in MODES) + f"{'modules':>9s}")
+    for rows in zip(*report.values()):
+        print(f"{rows[0]['phase']:20s} {rows[0]['kind']:10s}" + ''.join(f"{r['seconds'] * 1000:12.1f}" for r in rows)
+              + f"{rows[0]['new_modules']:9d}")
+    for mode, results in report.items():
+        totals = {kind: sum(r['seconds'] for r in results if r['kind'] == kind) for kind in ('import', 'artifacts')}
+        print(f"{mode}: imports {totals['import'] * 1000:.1f} ms, artifacts {totals['artifacts'] * 1000:.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
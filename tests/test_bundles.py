@@ -0,0 +1,65 @@
+# Бандлы из репозитория должны использоваться и после git clone, когда у файлов другие времена изменения:
+#   python -m pytest tests
+import os
+import pickle
+import shutil
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+
+import pytest
+
+from ModelStore import MODEL_BUNDLES, ArtifactRegistry
+
+
+@pytest.fixture
+def clone(tmp_path, monkeypatch):
+    # Копия моделей без сохранения времен изменения, как после git clone
+    shutil.copytree(os.path.join(ROOT, 'app', 'models'), tmp_path / 'app' / 'models', copy_function=shutil.copyfile)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def make_registry(use_mapped, use_packed):
+    loaded = []
+
+    def loader(path):
+        loaded.append(path)
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    registry = ArtifactRegistry(loader=loader)
+    registry.use_mapped, registry.use_packed = use_mapped, use_packed
+    return registry, loaded
+
+
+def source_paths():
+    return {os.path.abspath(path) for paths in MODEL_BUNDLES.values() for path in paths.values()}
+
+
+def test_packed_bundle_after_clone(clone):
+    registry, loaded = make_registry(use_mapped=False, use_packed=True)
+    for model_name in MODEL_BUNDLES:
+        registry.get_bundle(model_name)
+    assert not source_paths() & set(loaded)
+
+
+def test_changed_source_is_loaded_itself(clone):
+    registry, loaded = make_registry(use_mapped=False, use_packed=True)
+    path = MODEL_BUNDLES['model2']['meanNum']
+    with open(path, 'rb') as f:
+        means = pickle.load(f)
+    means['mileage'] = 1.0
+    with open(path, 'wb') as f:
+        pickle.dump(means, f)
+    assert registry.get(path)['mileage'] == 1.0
+    assert os.path.abspath(path) in loaded
+
+
+def test_mapped_bundle_after_clone(clone):
+    registry, loaded = make_registry(use_mapped=True, use_packed=False)
+    for model_name in MODEL_BUNDLES:
+        registry.get_bundle(model_name)
+    assert not source_paths() & set(loaded)
+    assert registry.report()['memory'].sum() < sum(os.path.getsize(path) for path in source_paths())
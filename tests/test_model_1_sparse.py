@@ -0,0 +1,71 @@
+# Прогноз модели 1 по CSR-матрице должен совпадать с прогнозом по плотному OHE-кадру:
+#   python -m pytest tests
+import os
+import sys
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from DataPreparation import preparation_for_model_1
+from ModelStore import MODEL_BUNDLES, load_artifact
+from Scoring import get_pred
+
+NAMES = ['Maruti Swift Dzire VDI', 'Hyundai i20 2015-2017 Sportz 1.2', 'Honda City i-VTEC VX', 'Toyota Innova 2.5 G',
+         'BMW X1 sDrive20d xLine', 'Mahindra XUV500 W8 2WD', 'Tata Nexon 1.5 Revotorq XZ Plus', 'Audi Q7 45 TDI',
+         # Марки, модели и комплектации, которых не было в обучении (handle_unknown)
+         'Lada Niva 4X4', 'Tesla Model 3 Long Range', 'Maruti Unknownmodel Xtra', '', None]
+
+
+@pytest.fixture(autouse=True)
+def root(monkeypatch):
+    # Пути к моделям относительные, как в StartApp.sh
+    monkeypatch.chdir(ROOT)
+
+
+def make_records(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'name': np.array(NAMES, dtype=object)[rng.integers(len(NAMES), size=n)],
+        # Electric, Hydrogen и 14 мест - незнакомые категории
+        'fuel': rng.choice(['Diesel', 'Petrol', 'CNG', 'LPG', 'Electric', 'Hydrogen'], n),
+        'transmission': rng.choice(['Manual', 'Automatic'], n),
+        'owner': rng.choice(['First Owner', 'Second Owner', 'Third Owner', 'Fourth & Above Owner', 'Test Drive Car'], n),
+        'seats': rng.choice([2, 4, 5, 6, 7, 8, 9, 10, 14], n),
+    })
+
+
+def dense_pred(df):
+    paths = MODEL_BUNDLES['model1']
+    X = preparation_for_model_1(df, paths['features'], paths['ohe'], paths['ohe_features'])
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        return load_artifact(paths['model']).predict(X)
+
+
+@pytest.mark.parametrize('n', [1, 17, 5000])
+def test_sparse_matches_dense(n):
+    df = make_records(n)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        sparse = get_pred(df, 'model1')
+    np.testing.assert_allclose(sparse, dense_pred(df), rtol=1e-9, atol=1e-6)
+
+
+def test_sharded_sparse_matches_dense():
+    from DataPreparation import Parallel
+
+    config = Parallel.get_config()
+    Parallel.configure(shards=2, min_rows=1000)
+    try:
+        df = make_records(5000, seed=1)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            sparse = get_pred(df, 'model1')
+    finally:
+        Parallel.configure(**config)
+    np.testing.assert_allclose(sparse, dense_pred(df), rtol=1e-9, atol=1e-6)
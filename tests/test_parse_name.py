@@ -0,0 +1,77 @@
+# Векторный разбор названий должен давать ровно то же, что построчный parse_name:
+#   python -m pytest tests
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from DataPreparation import utils
+
+BRANDS = {
+    'Maruti': ['Swift', 'Swift Dzire', 'Alto 800', 'Wagon R', 'Ertiga', 'Baleno', 'Ciaz'],
+    'Hyundai': ['i20', 'i10', 'Grand i10', 'Creta', 'Verna', 'Santro'],
+    'Honda': ['City', 'Amaze', 'Jazz', 'WR-V'],
+    'Toyota': ['Innova', 'Innova Crysta', 'Fortuner', 'Etios', 'Corolla Altis'],
+    'Mahindra': ['XUV500', 'Scorpio', 'Bolero', 'KUV 100', 'Thar'],
+    'Tata': ['Nexon', 'Tiago', 'Indica', 'Safari', 'Zest'],
+    'Ford': ['EcoSport', 'Figo', 'Endeavour', 'Aspire'],
+    'Volkswagen': ['Polo', 'Vento', 'Ameo'],
+    'BMW': ['X1', 'X3', '3 Series', '5 Series'],
+    'Audi': ['A4', 'A6', 'Q3', 'Q7'],
+    'Mercedes-Benz': ['E-Class', 'GLA'],
+    'Skoda': ['Rapid', 'Octavia'],
+}
+EXTRA = ['2015-2017', '1.2', '1.5', '2.0', '1197cc', '1248 CC', '998 cm3', 'BSIV', 'BS III', 'BS-III', 'BS 6', 'bs4',
+         'BSVI', '4X4', '4x2', '2WD', 'AWD', '(O)', 'sDrive20d', 'CRDi', 'VTVT', 'AT', 'MT', 'CVT', 'AMT', 'Auto',
+         'DSG', 'M Sport', 'N Line', 'GTI', 'AMG', 'Diesel+', 'Petrol/CNG', '7 Seater', 'GT-Line', 'Option', 'Plus',
+         'Sportz', 'Dual Tone', 'Signature', 'Anniversary', 'Ü']
+MISSING = [None, np.nan, '', '   ', 123, 'Maruti', ' BMW  ']
+
+
+def make_corpus(n, seed=0):
+    # Марка и модель плюс случайный набор ключевых слов разбора, разный регистр и разделители, пропуски
+    rng = np.random.default_rng(seed)
+    words = (EXTRA + list(utils.FUEL_KEYWORDS) + list(utils.BODY_KEYWORDS) + list(utils.TRANSMISSION_KEYWORDS)
+             + utils.SPORT_KEYWORDS + utils.TRIM_KEYWORDS)
+    brands = list(BRANDS)
+    names = []
+    for _ in range(n):
+        brand = brands[rng.integers(len(brands))]
+        parts = [brand, BRANDS[brand][rng.integers(len(BRANDS[brand]))]]
+        parts += [words[i] for i in rng.integers(len(words), size=rng.integers(0, 6))]
+        if rng.random() < 0.5:
+            parts = [rng.choice([p, p.upper(), p.lower(), p.title()]) for p in parts]
+        name = str(rng.choice([' ', ' ', ' ', '  ', '\t'])).join(parts)
+        names.append(' ' + name + ' ' if rng.random() < 0.1 else name)
+    for i in rng.integers(len(names), size=n // 100):
+        names[i] = MISSING[rng.integers(len(MISSING))]
+    return pd.Series(names, dtype=object)
+
+
+def reference(s):
+    return pd.DataFrame(list(s.apply(utils.parse_name)))
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    return make_corpus(50000)
+
+
+@pytest.mark.parametrize('parse', [utils.parse_name_columns, utils.parse_name_series])
+def test_matches_parse_name(corpus, parse):
+    pd.testing.assert_frame_equal(parse(corpus), reference(corpus))
+
+
+@pytest.mark.parametrize('parse', [utils.parse_name_columns, utils.parse_name_series])
+@pytest.mark.parametrize('s', [
+    pd.Series(MISSING, dtype=object),
+    pd.Series(['Maruti Swift VDI'] * 3, dtype=object),
+    pd.Series(['Maruti Swift VDI', 'Hyundai i20 Asta'], dtype='str'),
+], ids=['missing', 'repeated', 'string-dtype'])
+def test_edge_cases(parse, s):
+    pd.testing.assert_frame_equal(parse(s), reference(s))
@@ -0,0 +1,76 @@
+# Разбор mileage/engine/max_power: единицы, текст после единицы и счетчики разбора:
+#   python -m pytest tests
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from DataPreparation.utils import NUMERIC_UNITS, astype_numeric, parse_numeric_units, split_x
+
+
+def parse(values, col):
+    return parse_numeric_units(pd.Series(values, dtype=object), col)
+
+
+def test_unit_table():
+    assert NUMERIC_UNITS == {
+        'mileage': {'': 1.0, 'kmpl': 1.0, 'km/l': 1.0, 'kml': 1.0, 'km/kg': 1 / 1.4, 'mpg': 0.425144},
+        'engine': {'': 1.0, 'cc': 1.0, 'cm3': 1.0, 'l': 1000.0, 'litre': 1000.0, 'liter': 1000.0},
+        'max_power': {'': 1.0, 'bhp': 1.0, 'hp': 1.0, 'ps': 0.98632, 'kw': 1.34102},
+    }
+
+
+@pytest.mark.parametrize('col, text, expected', [
+    ('mileage', '23.4 kmpl', 23.4),
+    ('mileage', '23.4kmpl', 23.4),
+    ('mileage', '28 km/kg', 20.0),
+    ('mileage', '20 mpg', 8.50288),
+    ('mileage', '17', 17.0),
+    ('engine', '1248 CC', 1248.0),
+    ('engine', '1,248 CC', 1248.0),
+    ('engine', '1.2 L', 1200.0),
+    ('engine', '998cm3', 998.0),
+    ('max_power', '74 bhp', 74.0),
+    ('max_power', '88 PS', 86.79616),
+    ('max_power', '60 kW', 80.4612),
+    ('max_power', '1e2 bhp', 100.0),
+])
+def test_units(col, text, expected):
+    values, report = parse([text], col)
+    assert values[0] == pytest.approx(expected)
+    assert report['failed'] == 0
+
+
+@pytest.mark.parametrize('col, text, expected', [
+    ('mileage', '21 kmpl (ARAI)', 21.0),
+    ('mileage', '21 (ARAI)', 21.0),
+    ('max_power', '74 bhp@4000rpm', 74.0),
+    ('max_power', '74 bhp 4000', 74.0),
+    ('engine', '1248 CC BSIV', 1248.0),
+])
+def test_suffix_is_ignored(col, text, expected):
+    values, report = parse([text], col)
+    assert values[0] == expected
+    assert values[0] == split_x(text)
+
+
+def test_report_counts():
+    values, report = parse(['23.4 kmpl', '23.4 kmpl', '26.6 km/kg', '12 furlongs', 'abc', '', ' kmpl', None, np.nan, 17],
+                           'mileage')
+    assert np.isnan(values[3:9]).all()
+    assert dict(report) == {'rows': 10, 'failed': 2, 'missing': 4,
+                            'unit:kmpl': 2, 'unit:km/kg': 1, 'unit:-': 1}
+
+
+def test_matches_split_x_on_plain_values():
+    # Без единиц, с известной единицей через пробел и пропуски - так же, как построчный split_x
+    s = pd.Series(['23.4 kmpl', '18.9 kmpl', '17 km/l', '21 kmpl (ARAI)', '0', '5.5', None, np.nan, 'kmpl'] * 50,
+                  dtype=object)
+    df = astype_numeric(pd.DataFrame({'mileage': s}), 'mileage', float)
+    expected = s.apply(lambda x: split_x(x) if isinstance(x, str) else np.nan)
+    np.testing.assert_array_equal(df['mileage'].to_numpy(dtype=float), expected.to_numpy(dtype=float))
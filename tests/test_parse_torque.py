@@ -0,0 +1,88 @@
+# Разбор крутящего момента по колонке должен совпадать с построчным split_torque:
+#   python -m pytest tests
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from DataPreparation.utils import parse_torque_columns, split_torque, torque_parse_failures
+
+# Форматы из обучающей выборки: Nm и kgm, '@ rpm' с диапазонами, '(kgm@ rpm)', '+/-', 'at', пропуски
+DATASET = ['190Nm@ 2000rpm', '250Nm@ 1500-2500rpm', '12.7@ 2,700(kgm@ rpm)', '22.4 kgm at 1750-2750rpm',
+           '11.5@ 4,500(kgm@ rpm)', '113.75nm@ 4000rpm', '24@ 1,900-2,750(kgm@ rpm)', '400Nm',
+           '51nm@ 4000+/-500rpm', '48@ 3,000+/-500(nm@ rpm)', '110(11.2)@ 4800', '210 / 1900',
+           '380Nm(38.7kgm)@ 2500rpm', '135 Nm at 2500 rpm ', '96  Nm at 3000  rpm', '20.4@ 1400-3400(kgm@ rpm)',
+           '62Nm@ 3000rpm', '6.1kgm@ 3000rpm', '7.8kgm@ 4,500rpm', '14.9 KGM at 3000 RPM', '200Nm@ 1750~2750rpm',
+           '190@ 21,800(kgm@ rpm)', '150 nm at 1750-2500rpm', '115@ 3,500-4,500(kgm@ rpm)', '77.5 Nm at 4500 rpm',
+           '99.04Nm@ 4500rpm', '4.8kgm@ 3,000rpm', '6.1kgm@ 2500-3000rpm', '190 Nm @ 1750 rpm', '90Nm@ 3500rpm ',
+           '250@ 1250-5000rpm', '400', '400 nm', None, np.nan, 12.0]
+
+
+def make_corpus(n, seed=1):
+    # Случайные варианты тех же форматов: регистр, пробелы, запятые в оборотах, диапазоны, мусор
+    rnd = random.Random(seed)
+
+    def num():
+        return rnd.choice(['190', '22.4', '7', '113.75', '0', '05', '1.50', '2.', '.5', '1e3'])
+
+    def rpm():
+        return rnd.choice(['2000', '4,500', '1,750', '21,800', '1750', '4500,', ',4500', '04500', '3.5', ''])
+
+    def sp():
+        return rnd.choice(['', ' ', '  ', '\t', '\n'])
+
+    def span():
+        return rnd.choice(['', rpm() + rnd.choice(['-', '~', ' - ', '--'])])
+
+    formats = [
+        lambda: num() + rnd.choice(['', 'nm', 'Nm']) + '@ ' + rpm() + '+/-' + rnd.choice(['500', '', 'x'])
+        + rnd.choice(['rpm', '(nm@ rpm)', '', '(kgm@ rpm)']),
+        lambda: num() + sp() + rnd.choice(['nm', 'Nm', 'NM']) + '@ ' + span() + rpm()
+        + rnd.choice(['rpm', 'RPM', '', ' rpm', 'rpm ']) + sp(),
+        lambda: num() + '@ ' + span() + rpm() + rnd.choice(['(kgm@ rpm)', '(kgm@ rpm) ', '(KGM@ RPM)']),
+        lambda: num() + rnd.choice(['kgm', 'KGM', ' kgm']) + '@ ' + span() + rpm() + rnd.choice(['rpm', '', ' rpm']),
+        lambda: num() + rnd.choice([' kgm at ', 'kgm at ', ' kgm at  ']) + span() + rpm()
+        + rnd.choice(['rpm', ' rpm', 'rpm ']),
+        lambda: sp() + num() + sp() + rnd.choice(['nm at ', 'Nm at', 'nm  at ']) + sp() + span() + sp() + rpm()
+        + sp() + rnd.choice(['rpm', 'r', 'rpm ', '']) + sp(),
+        lambda: num() + rnd.choice(['', ' ', 'nm', ' nm ', 'nm(' + num() + 'kgm)', '(' + num() + ')',
+                                    ' (' + num() + ' nm)', 'kgm(' + num() + 'nm)'])
+        + '@ ' + span() + rpm() + rnd.choice(['rpm', '', 'rpm ']),
+        lambda: sp() + num() + sp() + rnd.choice(['nm', 'Nm', 'nm (x)', 'nmx']) + sp(),
+        lambda: sp() + num() + rnd.choice([' / ', '/', ' /  ']) + num() + sp(),
+    ]
+    return list(dict.fromkeys(rnd.choice(formats)() for _ in range(n)))
+
+
+def reference(values):
+    # Значения, которые split_torque разбирает, и отдельно те, на которых он падает
+    parsed, failing = [], []
+    for x in values:
+        try:
+            parsed.append((x, split_torque(x)))
+        except (ValueError, IndexError):
+            failing.append(x)
+    return parsed, failing
+
+
+@pytest.mark.parametrize('values', [DATASET, make_corpus(50000)], ids=['dataset', 'fuzz'])
+def test_matches_split_torque(values):
+    parsed, failing = reference(values)
+    s = pd.Series([x for x, _ in parsed] * 2, dtype=object)
+    torque, rpm = parse_torque_columns(s)
+    expected = np.array([result for _, result in parsed] * 2, dtype=float)
+    np.testing.assert_array_equal(torque, expected[:, 0])
+    np.testing.assert_array_equal(rpm, expected[:, 1])
+
+    # На чем падает split_torque, помечает torque_parse_failures и не разбирает parse_torque_columns
+    assert not torque_parse_failures(s).any()
+    if failing:
+        assert torque_parse_failures(pd.Series(failing, dtype=object)).all()
+        with pytest.raises((ValueError, IndexError)):
+            parse_torque_columns(pd.Series(failing[:1], dtype=object))